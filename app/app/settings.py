@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -53,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.HashingUnavailableMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -78,6 +80,13 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are kept for DB_CONN_MAX_AGE seconds and, unless
+# DB_CONN_HEALTH_CHECKS=0, checked before reuse. DB_POOL=1 uses a
+# psycopg pool per process instead: at most DB_POOL_MAX_SIZE
+# connections, requests wait up to DB_POOL_TIMEOUT seconds for one, and
+# connections idle for DB_POOL_MAX_IDLE seconds are closed.
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -85,6 +94,36 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60))),
+        'CONN_HEALTH_CHECKS': (
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'),
+    }
+}
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The in-memory default only suits a single process. Anything running
+# several (manage.py serve) needs a shared cache, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://redis:6379/0; see core.checks.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -107,6 +146,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 runs on a bounded thread pool (see core.hashing); it replaces
+# Django's own PBKDF2 hasher, which would otherwise verify existing hashes.
+PASSWORD_HASHERS = [
+    'core.hashing.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 iterations; stored hashes are upgraded on the next login
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 1000000))
+# Threads hashing passwords, and hashes allowed to run or wait before
+# further logins and signups are answered with 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_PENDING = int(
+    os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -153,3 +211,55 @@ REST_FRAMEWORK = {
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Recipe API pagination (applies when clients send ?cursor= or ?page_size=)
+RECIPE_API_PAGE_SIZE = int(os.environ.get('RECIPE_API_PAGE_SIZE', 50))
+RECIPE_API_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_API_MAX_PAGE_SIZE', 500))
+
+# Seconds a cached recipe list response may live (writes invalidate sooner)
+RECIPE_LIST_CACHE_TIMEOUT = int(os.environ.get('RECIPE_LIST_CACHE_TIMEOUT', 300))
+
+# Recipes read per server-side cursor fetch when streaming an export
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000))
+
+# Largest number of recipes accepted by one bulk import request
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 5000))
+# Largest NDJSON bulk import body, in bytes after decompression
+RECIPE_BULK_MAX_BYTES = int(
+    os.environ.get('RECIPE_BULK_MAX_BYTES', 10 * 1024 * 1024))
+
+# Users whose recipe similarity index each process keeps in memory, and
+# the bytes their postings may take in total
+SIMILARITY_INDEX_USERS = int(os.environ.get('SIMILARITY_INDEX_USERS', 50))
+SIMILARITY_INDEX_MAX_BYTES = int(
+    os.environ.get('SIMILARITY_INDEX_MAX_BYTES', 256 * 1024 * 1024))
+
+# Seconds signed access and refresh tokens stay valid
+ACCESS_TOKEN_LIFETIME = int(os.environ.get('ACCESS_TOKEN_LIFETIME', 300))
+REFRESH_TOKEN_LIFETIME = int(
+    os.environ.get('REFRESH_TOKEN_LIFETIME', 14 * 24 * 60 * 60))
+
+# Seconds each process trusts its copy of a user's token revocation
+# (0 disables revocation checks); users whose copies it keeps
+TOKEN_REVOCATION_CHECK_INTERVAL = int(
+    os.environ.get('TOKEN_REVOCATION_CHECK_INTERVAL', 10))
+TOKEN_REVOCATION_CACHE_ENTRIES = int(
+    os.environ.get('TOKEN_REVOCATION_CACHE_ENTRIES', 10000))
+
+# Database reads the async views of one process may run at once
+ASYNC_DB_CONCURRENCY = int(os.environ.get('ASYNC_DB_CONCURRENCY', 20))
+
+# Production server (manage.py serve): database connections one
+# container may hold, threads per worker, requests before a worker is
+# recycled, and seconds before a stuck or draining worker is killed
+SERVE_DB_CONNECTIONS = int(os.environ.get('SERVE_DB_CONNECTIONS', 40))
+SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 4))
+SERVE_MAX_REQUESTS = int(os.environ.get('SERVE_MAX_REQUESTS', 1000))
+SERVE_TIMEOUT = int(os.environ.get('SERVE_TIMEOUT', 60))
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30))
+
+# Tag/ingredient autocomplete
+AUTOCOMPLETE_LIMIT = int(os.environ.get('AUTOCOMPLETE_LIMIT', 10))
+AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get('AUTOCOMPLETE_MAX_LIMIT', 50))
+AUTOCOMPLETE_CACHE_ENTRIES = int(
+    os.environ.get('AUTOCOMPLETE_CACHE_ENTRIES', 10000))
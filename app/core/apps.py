@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from core import metrics
+        from core.checks import check_shared_cache
+        from core.db import connection_stats, count_connection
+        from core.hashing import hashing_pool
+
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
+        connection_created.connect(count_connection)
+        metrics.register('password_hashing', hashing_pool.stats)
+        metrics.register('database', connection_stats)
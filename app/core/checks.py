@@ -0,0 +1,31 @@
+"""
+System checks for the settings a deployment depends on.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+
+
+def uses_local_cache():
+    """Return whether the default cache lives in each process's memory."""
+    return isinstance(caches['default'], LocMemCache)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Require a cache shared by all processes in deployments.
+
+    Data versions, token revocations and the similarity change log are
+    kept in the default cache, so a cache of one process's own would let
+    the others keep serving data from before a write. The check is only
+    run by ``check --deploy``, whatever DEBUG says.
+    """
+    if not uses_local_cache():
+        return []
+
+    return [Error(
+        'The default cache is local to each process, so writes handled '
+        'by one process do not invalidate what the others have cached.',
+        hint='Set CACHE_BACKEND and CACHE_LOCATION to a Redis or '
+             'Memcached server.',
+        id='core.E001',
+    )]
@@ -0,0 +1,56 @@
+"""
+Metrics on the database connections of this process.
+"""
+import threading
+
+from django.db import connections
+
+_lock = threading.Lock()
+_opened = {}
+
+
+def count_connection(sender, connection, **kwargs):
+    """Count a newly opened connection; connected to connection_created."""
+    with _lock:
+        _opened[connection.alias] = _opened.get(connection.alias, 0) + 1
+
+
+def _pool_stats(pool):
+    """Return the utilization of a connection pool."""
+    stats = pool.get_stats()
+    in_use = stats['pool_size'] - stats['pool_available']
+
+    return {
+        'mode': 'pool',
+        'size': stats['pool_size'],
+        'max_size': stats['pool_max'],
+        'in_use': in_use,
+        'available': stats['pool_available'],
+        'waiting': stats['requests_waiting'],
+        'utilization': in_use / stats['pool_max'],
+        'wait_ms': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'lost': stats.get('connections_lost', 0),
+        'opened': stats.get('connections_num', 0),
+    }
+
+
+def database_stats(connection):
+    """Return pool utilization, or the connection settings and count."""
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        return _pool_stats(pool)
+
+    max_age = connection.settings_dict['CONN_MAX_AGE']
+    return {
+        'mode': 'persistent' if max_age else 'per_request',
+        'max_age': max_age,
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'opened': _opened.get(connection.alias, 0),
+    }
+
+
+def connection_stats():
+    """Return the stats of every configured database."""
+    return {alias: database_stats(connections[alias])
+            for alias in connections}
@@ -0,0 +1,101 @@
+"""
+Password hashing on a bounded pool of worker threads.
+
+PBKDF2 costs hundreds of milliseconds of CPU per password. Running it on
+a few dedicated threads caps how much of the machine logins and signups
+can take, and a limit on waiting hashes turns a burst of them into fast
+503 responses instead of a backlog that starves every other request.
+hashlib releases the GIL while hashing, so the threads run in parallel.
+The calling thread still waits for its hash: the pool bounds CPU, not
+the request threads held by logins.
+
+Outside DRF views, core.middleware answers HashingUnavailable with 503.
+Management commands run in a process of their own, whose pool is idle.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingUnavailable(APIException):
+    """Raised when too many passwords are already waiting to be hashed."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress, try again shortly.'
+    default_code = 'hashing_unavailable'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+class HashingPool:
+    """Run hashing calls on a fixed number of threads.
+
+    At most ``max_pending`` calls may be running or queued at once; any
+    more are refused with HashingUnavailable rather than waiting.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        """Return the executor, starting it in this process on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='password-hashing')
+            return self._executor
+
+    def run(self, func, *args, **kwargs):
+        """Return func(*args, **kwargs) computed on a pool thread."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingUnavailable()
+        try:
+            result = self._get_executor().submit(
+                func, *args, **kwargs).result()
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+        return result
+
+    def stats(self):
+        """Return the pool size and call counters."""
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+
+hashing_pool = HashingPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher that runs on the hashing pool.
+
+    The iteration count comes from settings.PASSWORD_HASH_ITERATIONS.
+    Django re-hashes a password on a successful login whenever its stored
+    count differs, so the cost can be tuned without resetting passwords.
+    The algorithm name is unchanged, so existing hashes stay valid.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        return hashing_pool.run(super().encode, password, salt, iterations)
@@ -0,0 +1,110 @@
+"""
+Django command measuring the throughput of a running API server.
+"""
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Send GET requests to a URL from many concurrent clients.
+
+    Each client keeps its connection open while the server allows it.
+    Point it at the same endpoint served over WSGI and over ASGI, for
+    example ``/api/recipe/recipes/`` and ``/api/recipe/async/recipes/``,
+    to compare the two request paths under the same load.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument(
+            '--token', help='Authorization header value, e.g. "Bearer ..."')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only http:// URLs are supported.')
+
+        latencies, errors, elapsed = asyncio.run(self._run(url, options))
+        if not latencies:
+            raise CommandError(f'All {errors} requests failed.')
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{len(latencies)} requests in {elapsed:.2f} s: '
+            f'{len(latencies) / elapsed:.0f} req/s, '
+            f'median {statistics.median(latencies):.1f} ms, '
+            f'p99 {p99:.1f} ms, {errors} errors')
+
+    async def _run(self, url, options):
+        """Run the clients; return latencies in ms, errors and seconds."""
+        path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        headers = [f'GET {path} HTTP/1.1', f'Host: {url.netloc}']
+        if options['token']:
+            headers.append(f'Authorization: {options["token"]}')
+        request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+        remaining = options['requests']
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal remaining, errors
+            reader = writer = None
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            url.hostname, url.port or 80)
+                    writer.write(request)
+                    status, keep_alive = await self._read_response(reader)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    status, keep_alive = None, False
+                if status == 200:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(client() for _ in range(options['concurrency'])))
+
+        return latencies, errors, time.perf_counter() - start
+
+    async def _read_response(self, reader):
+        """Read one response; return its status and whether to reuse."""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        fields = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                fields[name.strip().lower()] = value.strip().lower()
+
+        if 'content-length' in fields:
+            await reader.readexactly(int(fields['content-length']))
+        elif fields.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await reader.read()
+            return status, False
+
+        return status, fields.get('connection') != 'close'
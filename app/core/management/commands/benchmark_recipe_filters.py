@@ -0,0 +1,97 @@
+"""
+Django command comparing JOIN+DISTINCT and EXISTS recipe filtering.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.management.seed import seed_library
+from core.models import Recipe
+from recipe.filters import filter_recipes
+
+
+class Command(BaseCommand):
+    """Benchmark recipe tag/ingredient filtering on synthetic data.
+
+    All data is created inside a transaction that is rolled back at the
+    end, so the command can be pointed at any database.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--explain', action='store_true',
+                            help='Print EXPLAIN ANALYZE for each query.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _run(self, options):
+        user = get_user_model().objects.create_user(
+            'benchmark@example.com', None)
+        start = time.perf_counter()
+        tag_ids, ingredient_ids = seed_library(
+            user, options['recipes'], options['tags'],
+            options['ingredients'], options['tags_per_recipe'],
+            options['ingredients_per_recipe'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(
+            f'Seeded {options["recipes"]} recipes in '
+            f'{time.perf_counter() - start:.1f}s')
+
+        recipes = Recipe.objects.filter(user=user)
+        scenarios = {
+            'narrow': (tag_ids[:2], ingredient_ids[:3]),
+            'broad': (tag_ids[:len(tag_ids) // 2],
+                      ingredient_ids[:len(ingredient_ids) // 2]),
+        }
+        for scenario, (tags, ingredients) in scenarios.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{scenario} filter: {len(tags)} tags, '
+                f'{len(ingredients)} ingredients'))
+            legacy = recipes.filter(tags__id__in=tags).filter(
+                ingredients__id__in=ingredients).order_by('-id').distinct()
+            cases = {
+                'join+distinct (any)': legacy,
+                'exists (any)': filter_recipes(
+                    recipes, tags, ingredients).order_by('-id'),
+                'exists (all)': filter_recipes(
+                    recipes, tags, ingredients, match_all=True
+                ).order_by('-id'),
+            }
+            for name, queryset in cases.items():
+                self._report(name, queryset, options)
+
+    def _report(self, name, queryset, options):
+        """Time one filtering strategy and optionally print its plan."""
+        ids = queryset.values_list('id', flat=True)
+        self.stdout.write(f'{name}: {ids.count()} rows')
+        self._time('full list', ids, options['repeat'])
+        self._time('first page', ids[:options['page_size']],
+                   options['repeat'])
+        if options['explain']:
+            self.stdout.write(ids.explain(analyze=True))
+
+    def _time(self, label, queryset, repeat):
+        """Report median and worst latency of evaluating a queryset."""
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            samples.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f'  {label}: median {statistics.median(samples):.2f} ms, '
+            f'max {max(samples):.2f} ms')
@@ -0,0 +1,94 @@
+"""
+Django command benchmarking the recipe similarity index.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.management.seed import seed_library
+from core.models import Recipe
+from recipe.similarity import SimilarityIndex
+
+
+class Command(BaseCommand):
+    """Time building, querying and patching a similarity index.
+
+    Queries are compared with a full scan that scores every recipe. All
+    data is created inside a transaction that is rolled back at the end,
+    so the command can be pointed at any database.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _run(self, options):
+        user = get_user_model().objects.create_user(
+            'benchmark@example.com', None)
+        seed_library(
+            user, options['recipes'], options['tags'],
+            options['ingredients'], options['tags_per_recipe'],
+            options['ingredients_per_recipe'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        recipe_ids = list(Recipe.objects.filter(
+            user=user).values_list('id', flat=True))
+
+        start = time.perf_counter()
+        index = SimilarityIndex.build(user)
+        self.stdout.write(
+            f'Built index of {len(index.features)} recipes in '
+            f'{(time.perf_counter() - start) * 1000:.0f} ms')
+
+        rng = random.Random(0)
+        samples = [rng.choice(recipe_ids) for _ in range(options['repeat'])]
+        self._time('index query', samples,
+                   lambda rid: index.similar(rid, options['limit']))
+        self._time('full scan', samples[:20],
+                   lambda rid: self._scan(index, rid, options['limit']))
+
+        recipe = Recipe.objects.get(id=samples[0])
+        recipe.tags.clear()
+        self._time('patch one recipe', samples[:20],
+                   lambda rid: index.refresh(user, [rid]))
+
+    def _scan(self, index, recipe_id, limit):
+        """Score every recipe against one, without the inverted index."""
+        mine = index.features[recipe_id]
+        scores = []
+        for other, features in index.features.items():
+            shared = len(mine & features)
+            if shared and other != recipe_id:
+                scores.append(
+                    (shared / (len(mine) + len(features) - shared), other))
+
+        return sorted(scores, reverse=True)[:limit]
+
+    def _time(self, label, recipe_ids, run):
+        """Report median and 99th percentile latency of an operation."""
+        samples = []
+        for recipe_id in recipe_ids:
+            start = time.perf_counter()
+            run(recipe_id)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        self.stdout.write(
+            f'{label}: median {statistics.median(samples):.2f} ms, '
+            f'p99 {p99:.2f} ms')
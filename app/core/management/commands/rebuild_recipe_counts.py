@@ -0,0 +1,43 @@
+"""
+Django command to recompute the recipe counts on tags and ingredients.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Ingredient, Recipe, Tag
+
+
+class Command(BaseCommand):
+    """Recompute Tag.recipe_count and Ingredient.recipe_count.
+
+    Database triggers keep the counts exact, so this is only needed after
+    the triggers were bypassed (for example by a raw restore). Writes to
+    each link table are blocked while its counts are rebuilt.
+    """
+    help = __doc__
+
+    def handle(self, *args, **options):
+        for model, relation in ((Tag, 'tags'), (Ingredient, 'ingredients')):
+            fixed = self._rebuild(model, relation)
+            self.stdout.write(
+                f'Fixed {fixed} {model._meta.verbose_name} counts.')
+
+        self.stdout.write(self.style.SUCCESS('Recipe counts rebuilt.'))
+
+    def _rebuild(self, model, relation):
+        """Update the counts that differ from the link table."""
+        field = Recipe._meta.get_field(relation)
+        through = field.remote_field.through
+        column = field.m2m_reverse_name()
+        links = through.objects.filter(**{column: OuterRef('pk')}).order_by(
+        ).values(column).annotate(links=Count('*')).values('links')
+        actual = Coalesce(Subquery(links), 0)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('LOCK TABLE {} IN SHARE MODE'.format(
+                    connection.ops.quote_name(through._meta.db_table)))
+            return model.objects.exclude(recipe_count=actual).update(
+                recipe_count=actual)
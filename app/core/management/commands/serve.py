@@ -0,0 +1,130 @@
+"""
+Django command to run the API under gunicorn in production.
+"""
+import os
+import shlex
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.checks import uses_local_cache
+
+
+def available_cpus():
+    """Return the CPUs this process may use, honouring cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def tune(cpus, db_connections, threads, per_worker=None):
+    """Return the (workers, threads) to run with.
+
+    Workers follow the usual 2 * CPUs + 1, capped so that all of them
+    together stay within the database connection budget: each thread of
+    a threaded worker may hold a connection, while a pooled or async
+    worker holds up to per_worker.
+    """
+    if per_worker is None:
+        threads = max(1, min(threads, db_connections))
+        per_worker = threads
+    workers = max(1, min(2 * cpus + 1, db_connections // per_worker))
+
+    return workers, threads
+
+
+class Command(BaseCommand):
+    """Start gunicorn with workers and threads sized for this machine.
+
+    The application is preloaded so workers share its memory until they
+    write to it, workers are recycled after a number of requests to
+    bound memory growth, and SIGTERM drains in-flight requests for up to
+    the graceful timeout. gunicorn replaces this process, so signals
+    reach it directly. More than one worker needs a shared cache; without
+    one a single worker is started.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind', default=f'0.0.0.0:{os.environ.get("PORT", "8000")}')
+        parser.add_argument('--workers', type=int)
+        parser.add_argument('--threads', type=int)
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Serve through uvicorn workers, for the async views.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the gunicorn command instead of running it.')
+
+    def handle(self, *args, **options):
+        argv = self.gunicorn_argv(options)
+        if options['dry_run']:
+            self.stdout.write(shlex.join(argv))
+            return
+
+        if options['asgi']:
+            # Async requests run on short-lived threads, which would each
+            # keep a persistent connection open.
+            os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+        os.execvp(argv[0], argv)
+
+    def gunicorn_argv(self, options):
+        """Return the gunicorn command line for the options."""
+        threads = options['threads'] or settings.SERVE_THREADS
+        pool = settings.DATABASES['default'].get('OPTIONS', {}).get('pool')
+        if pool:
+            per_worker = pool['max_size']
+        elif options['asgi']:
+            per_worker = settings.ASYNC_DB_CONCURRENCY
+        else:
+            per_worker = None
+        workers, threads = tune(
+            available_cpus(), settings.SERVE_DB_CONNECTIONS, threads,
+            per_worker)
+        if uses_local_cache() and (options['workers'] or workers) > 1:
+            # Workers would serve each other's stale data from caches of
+            # their own.
+            if options['workers']:
+                raise CommandError(
+                    'The default cache is local to each process, so workers '
+                    'would serve each other\'s stale data. Set CACHE_BACKEND '
+                    'and CACHE_LOCATION to a Redis or Memcached server, or '
+                    'run with --workers 1.')
+            self.stderr.write(self.style.WARNING(
+                'The default cache is local to each process; serving with '
+                f'1 worker instead of {workers}. Set CACHE_BACKEND and '
+                'CACHE_LOCATION to a Redis or Memcached server to run more.'))
+            workers = 1
+        workers = options['workers'] or workers
+        max_requests = settings.SERVE_MAX_REQUESTS
+
+        argv = [
+            'gunicorn',
+            '--bind', options['bind'],
+            '--workers', str(workers),
+            '--preload',
+            '--max-requests', str(max_requests),
+            '--max-requests-jitter', str(max_requests // 10),
+            '--timeout', str(settings.SERVE_TIMEOUT),
+            '--graceful-timeout', str(settings.SERVE_GRACEFUL_TIMEOUT),
+            '--access-logfile', '-',
+        ]
+        if options['asgi']:
+            argv += ['--worker-class', 'uvicorn.workers.UvicornWorker',
+                     'app.asgi:application']
+        else:
+            argv += ['--worker-class', 'gthread', '--threads', str(threads),
+                     'app.wsgi:application']
+
+        return argv
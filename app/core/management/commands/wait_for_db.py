@@ -6,7 +6,7 @@ from django.core.management.base import BaseCommand
 import time
 
 from django.db.utils import OperationalError
-from psycopg2 import OperationalError as Psycopg2Error
+from psycopg import OperationalError as PsycopgError
 
 
 class Command(BaseCommand):
@@ -20,7 +20,7 @@ class Command(BaseCommand):
             try:
                 self.check(databases=['default'])
                 db_up = True
-            except (Psycopg2Error, OperationalError):
+            except (PsycopgError, OperationalError):
                 self.stdout.write('Database unavailable, waiting 1 second...')
                 time.sleep(1)
 
@@ -0,0 +1,49 @@
+"""
+Synthetic data generation for the recipe benchmark commands.
+"""
+import random
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+
+BATCH_SIZE = 5000
+
+
+def seed_library(user, recipes, tags, ingredients, tags_per_recipe,
+                 ingredients_per_recipe, seed=0):
+    """Bulk insert a random recipe library for a user.
+
+    Returns the lists of created tag and ingredient ids.
+    """
+    rng = random.Random(seed)
+    tag_ids = [t.id for t in Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tags))]
+    ingredient_ids = [i.id for i in Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(ingredients))]
+
+    tag_links = Recipe.tags.through
+    ingredient_links = Recipe.ingredients.through
+    for start in range(0, recipes, BATCH_SIZE):
+        batch = Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=f'Recipe {n}',
+                description=f'Synthetic recipe number {n}',
+                time_minutes=rng.randint(5, 240),
+                price=Decimal(rng.randint(100, 99999)) / 100,
+            )
+            for n in range(start, min(start + BATCH_SIZE, recipes))
+        )
+        tag_links.objects.bulk_create(
+            tag_links(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe in batch
+            for tag_id in rng.sample(tag_ids, tags_per_recipe)
+        )
+        ingredient_links.objects.bulk_create(
+            ingredient_links(recipe_id=recipe.id, ingredient_id=ing_id)
+            for recipe in batch
+            for ing_id in rng.sample(ingredient_ids, ingredients_per_recipe)
+        )
+
+    return tag_ids, ingredient_ids
@@ -0,0 +1,14 @@
+"""
+Registry of runtime metrics exposed through the API.
+"""
+_sources = {}
+
+
+def register(name, collect):
+    """Register a callable returning a dict of metrics under a name."""
+    _sources[name] = collect
+
+
+def collect_all():
+    """Return the current values of all registered metrics."""
+    return {name: collect() for name, collect in _sources.items()}
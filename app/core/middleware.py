@@ -0,0 +1,30 @@
+"""
+Middleware for the application.
+"""
+from django.http import HttpResponse
+
+from core.hashing import HashingUnavailable
+
+
+class HashingUnavailableMiddleware:
+    """Answer HashingUnavailable raised outside the API with 503.
+
+    DRF views turn it into a JSON response themselves; this covers the
+    admin login and any other view that checks a password.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingUnavailable):
+            return None
+
+        response = HttpResponse(
+            exception.detail, content_type='text/plain; charset=utf-8',
+            status=exception.status_code)
+        response['Retry-After'] = str(exception.wait)
+        return response
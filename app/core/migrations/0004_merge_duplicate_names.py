@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:14
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a (user, name) pair.
+
+    Recipes linked to a duplicate are re-linked to the oldest row of the
+    group before the duplicates are deleted.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (('Tag', 'tags'),
+                                   ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = Recipe._meta.get_field(field_name).remote_field.through
+        column = f'{model_name.lower()}_id'
+        groups = model.objects.values('user', 'name').annotate(
+            rows=Count('id'), keep=Min('id')).filter(rows__gt=1)
+
+        for group in groups:
+            duplicates = model.objects.filter(
+                user=group['user'], name=group['name']
+            ).exclude(id=group['keep'])
+            linked = set(through.objects.filter(
+                **{f'{column}__in': duplicates}
+            ).values_list('recipe_id', flat=True))
+            linked -= set(through.objects.filter(
+                **{column: group['keep']}
+            ).values_list('recipe_id', flat=True))
+            through.objects.bulk_create(
+                through(recipe_id=recipe_id, **{column: group['keep']})
+                for recipe_id in linked
+            )
+            duplicates.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_recipe_user_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names, migrations.RunPython.noop),
+    ]
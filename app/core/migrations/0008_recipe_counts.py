@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+# (link table, counted table, link column) for each recipe relation.
+RELATIONS = [
+    ('core_recipe_tags', 'core_tag', 'tag_id'),
+    ('core_recipe_ingredients', 'core_ingredient', 'ingredient_id'),
+]
+
+# Statement-level triggers see every row a statement inserted or deleted
+# in a transition table, so a bulk insert of links costs one grouped
+# UPDATE rather than one UPDATE per link.
+TRIGGER_SQL = """
+CREATE FUNCTION {link}_count_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE {table} SET recipe_count = recipe_count + changed.links
+    FROM (SELECT {column}, count(*) AS links FROM new_links
+          GROUP BY {column}) AS changed
+    WHERE {table}.id = changed.{column};
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION {link}_count_delete() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE {table} SET recipe_count = recipe_count - changed.links
+    FROM (SELECT {column}, count(*) AS links FROM old_links
+          GROUP BY {column}) AS changed
+    WHERE {table}.id = changed.{column};
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER {link}_count_insert AFTER INSERT ON {link}
+REFERENCING NEW TABLE AS new_links
+FOR EACH STATEMENT EXECUTE FUNCTION {link}_count_insert();
+
+CREATE TRIGGER {link}_count_delete AFTER DELETE ON {link}
+REFERENCING OLD TABLE AS old_links
+FOR EACH STATEMENT EXECUTE FUNCTION {link}_count_delete();
+
+UPDATE {table} SET recipe_count = counts.links
+FROM (SELECT {column}, count(*) AS links FROM {link}
+      GROUP BY {column}) AS counts
+WHERE {table}.id = counts.{column};
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER {link}_count_insert ON {link};
+DROP TRIGGER {link}_count_delete ON {link};
+DROP FUNCTION {link}_count_insert();
+DROP FUNCTION {link}_count_delete();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        *(migrations.RunSQL(
+            TRIGGER_SQL.format(link=link, table=table, column=column),
+            REVERSE_SQL.format(link=link, table=table, column=column),
+        ) for link, table, column in RELATIONS),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count', '-name'], name='ingredient_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count', '-name'], name='tag_popularity_idx'),
+        ),
+    ]
@@ -5,7 +5,10 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin)
 
@@ -67,30 +70,110 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Maintained by PostgreSQL on every write; title matches rank higher.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='recipe_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+class RecipeCountMixin:
+    """Leave ``recipe_count`` out of updates made through save().
+
+    The count is written only by database triggers on the recipe link
+    table, so saving back the value read earlier in a request would undo
+    links added or removed in the meantime.
+    """
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'recipe_count'
+                and field.attname not in deferred]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class Tag(RecipeCountMixin, models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Maintained by database triggers on the recipe link table; see
+    # migration 0008 and the rebuild_recipe_counts command.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            # The constraint's unique index doubles as the (user, name)
+            # index used for name lookups and name-ordered listings.
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+        indexes = [
+            # Case-insensitive name prefix and word prefix lookups
+            # for autocomplete.
+            models.Index(
+                'user', OpClass(Lower('name'), name='text_pattern_ops'),
+                name='tag_name_prefix_idx',
+            ),
+            GinIndex(SearchVector('name', config='simple'),
+                     name='tag_name_words_idx'),
+            models.Index(fields=['user', '-recipe_count', '-name'],
+                         name='tag_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountMixin, models.Model):
     """Ingredient for recipes."""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Maintained by database triggers on the recipe link table; see
+    # migration 0008 and the rebuild_recipe_counts command.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                'user', OpClass(Lower('name'), name='text_pattern_ops'),
+                name='ingredient_name_prefix_idx',
+            ),
+            GinIndex(SearchVector('name', config='simple'),
+                     name='ingredient_name_words_idx'),
+            models.Index(fields=['user', '-recipe_count', '-name'],
+                         name='ingredient_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.name
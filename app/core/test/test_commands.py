@@ -1,13 +1,27 @@
 """
 Test cases for the commands module.
 """
+from io import StringIO
 from unittest.mock import patch
-from psycopg2 import OperationalError as Psycopg2Error
+from psycopg import OperationalError as PsycopgError
 
-from django.core.management import call_command
-from django.test import SimpleTestCase
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.core.management.base import SystemCheckError
+from django.test import SimpleTestCase, override_settings
 from django.db.utils import OperationalError
 
+from core.checks import check_shared_cache
+from core.management.commands.serve import tune
+
+SHARED_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': 'redis://localhost:6379/0',
+}}
+LOCAL_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+
 
 class CommandTests(SimpleTestCase):
     """Test commands."""
@@ -25,10 +39,139 @@ class CommandTests(SimpleTestCase):
     @patch('time.sleep')
     def test_wait_for_db_delay(self, patched_sleep, patched_check):
         """Test waiting for db when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2Error] * 2 + \
+        patched_check.side_effect = [PsycopgError] * 2 + \
             [OperationalError] * 3 + [True]
 
         call_command('wait_for_db')
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+@override_settings(SERVE_DB_CONNECTIONS=40, SERVE_THREADS=4,
+                   SERVE_MAX_REQUESTS=1000, ASYNC_DB_CONCURRENCY=20,
+                   CACHES=SHARED_CACHES)
+class ServeCommandTests(SimpleTestCase):
+    """Test the production server launcher."""
+
+    def test_tune(self):
+        """Test workers follow the CPUs within the connection budget."""
+        self.assertEqual(tune(1, 40, 4), (3, 4))
+        self.assertEqual(tune(8, 40, 4), (10, 4))
+        self.assertEqual(tune(8, 2, 4), (1, 2))
+        self.assertEqual(tune(8, 40, 1, per_worker=20), (2, 1))
+
+    @patch('core.management.commands.serve.available_cpus', return_value=2)
+    @patch('os.execvp')
+    def test_serve(self, patched_execvp, patched_cpus):
+        """Test gunicorn replaces the process with tuned options."""
+        call_command('serve', bind='127.0.0.1:9000')
+
+        argv = patched_execvp.call_args.args[1]
+        self.assertEqual(patched_execvp.call_args.args[0], 'gunicorn')
+        self.assertEqual(argv[-1], 'app.wsgi:application')
+        for option, value in (('--workers', '5'), ('--threads', '4'),
+                              ('--bind', '127.0.0.1:9000'),
+                              ('--max-requests', '1000'),
+                              ('--max-requests-jitter', '100'),
+                              ('--worker-class', 'gthread')):
+            self.assertEqual(argv[argv.index(option) + 1], value)
+        self.assertIn('--preload', argv)
+
+    @patch('core.management.commands.serve.available_cpus', return_value=8)
+    def test_serve_asgi_dry_run(self, patched_cpus):
+        """Test async workers are sized by their connection slots."""
+        out = StringIO()
+
+        call_command('serve', asgi=True, dry_run=True, stdout=out)
+
+        self.assertIn('--workers 2 ', out.getvalue())
+        self.assertIn('uvicorn.workers.UvicornWorker app.asgi:application',
+                      out.getvalue())
+
+    @patch('core.management.commands.serve.available_cpus', return_value=8)
+    def test_serve_pooled_dry_run(self, patched_cpus):
+        """Test pooled workers are sized by the pool."""
+        out = StringIO()
+
+        with patch.dict(settings.DATABASES['default'],
+                        {'OPTIONS': {'pool': {'max_size': 8}}}):
+            call_command('serve', dry_run=True, stdout=out)
+
+        self.assertIn('--workers 5 ', out.getvalue())
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @patch('core.management.commands.serve.available_cpus', return_value=2)
+    @patch('os.execvp')
+    def test_serve_local_cache(self, patched_execvp, patched_cpus):
+        """Test a per-process cache falls back to one worker."""
+        err = StringIO()
+
+        call_command('serve', stderr=err)
+
+        argv = patched_execvp.call_args.args[1]
+        self.assertEqual(argv[argv.index('--workers') + 1], '1')
+        self.assertIn('CACHE_BACKEND', err.getvalue())
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @patch('core.management.commands.serve.available_cpus', return_value=2)
+    def test_serve_local_cache_dry_run(self, patched_cpus):
+        """Test the dry run shows the single worker fallback."""
+        out = StringIO()
+
+        call_command('serve', dry_run=True, stdout=out, stderr=StringIO())
+
+        self.assertIn('--workers 1 ', out.getvalue())
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @patch('core.management.commands.serve.available_cpus', return_value=2)
+    @patch('os.execvp')
+    def test_serve_local_cache_workers(self, patched_execvp, patched_cpus):
+        """Test several workers asked for are refused a per-process cache."""
+        with self.assertRaisesMessage(CommandError, 'CACHE_BACKEND'):
+            call_command('serve', workers=3)
+
+        patched_execvp.assert_not_called()
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @patch('core.management.commands.serve.available_cpus', return_value=2)
+    def test_serve_local_cache_one_worker(self, patched_cpus):
+        """Test a single worker may use a per-process cache."""
+        out = StringIO()
+        err = StringIO()
+
+        call_command('serve', workers=1, dry_run=True, stdout=out,
+                     stderr=err)
+
+        self.assertIn('--workers 1 ', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+
+
+class CheckTests(SimpleTestCase):
+    """Test the deployment checks."""
+
+    @override_settings(DEBUG=False, CACHES=LOCAL_CACHES)
+    def test_local_cache_outside_debug(self):
+        """Test a per-process cache is an error outside DEBUG."""
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(DEBUG=True, CACHES=LOCAL_CACHES)
+    def test_local_cache_in_debug(self):
+        """Test DEBUG does not silence the deployment check."""
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_deploy_check_reports_local_cache(self):
+        """Test check --deploy reports the settings' per-process cache."""
+        with self.assertRaisesMessage(SystemCheckError, 'core.E001'):
+            call_command('check', deploy=True, stdout=StringIO(),
+                         stderr=StringIO())
+
+    @override_settings(DEBUG=False, CACHES=SHARED_CACHES)
+    def test_shared_cache(self):
+        """Test a shared cache passes."""
+        self.assertEqual(check_shared_cache(None), [])
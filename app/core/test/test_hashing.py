@@ -0,0 +1,107 @@
+"""
+Tests for password hashing on the bounded pool.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.hashing import HashingPool, HashingUnavailable, hashing_pool
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test the bounded hashing pool."""
+
+    def test_run(self):
+        """Test calls run on a pool thread and return their result."""
+        pool = HashingPool(1, 1)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith('password-hashing'))
+        self.assertEqual(pool.stats()['completed'], 1)
+
+    def test_rejects_when_full(self):
+        """Test calls beyond max_pending fail at once."""
+        pool = HashingPool(1, 1)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait()
+        try:
+            with self.assertRaises(HashingUnavailable):
+                pool.run(len, 'password')
+        finally:
+            release.set()
+            worker.join()
+
+        self.assertEqual(pool.run(len, 'password'), 8)
+        self.assertEqual(pool.stats()['rejected'], 1)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingApiTests(TestCase):
+    """Test logins and signups hash on the pool."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com', 'testpass123')
+
+    def test_overload_returns_503(self):
+        """Test logins and signups are shed while the pool is full."""
+        for _ in range(hashing_pool.max_pending):
+            hashing_pool._slots.acquire()
+        try:
+            login = self.client.post(reverse('user:token'), {
+                'email': 'test@example.com', 'password': 'testpass123'})
+            signup = self.client.post(reverse('user:create'), {
+                'email': 'new@example.com', 'password': 'testpass123',
+                'name': 'New'})
+        finally:
+            for _ in range(hashing_pool.max_pending):
+                hashing_pool._slots.release()
+
+        for response in (login, signup):
+            self.assertEqual(
+                response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(get_user_model().objects.filter(
+            email='new@example.com').exists())
+
+    def test_admin_overload_returns_503(self):
+        """Test the admin login is shed rather than failing with 500."""
+        for _ in range(hashing_pool.max_pending):
+            hashing_pool._slots.acquire()
+        try:
+            response = self.client.post(reverse('admin:login'), {
+                'username': 'test@example.com', 'password': 'testpass123'})
+        finally:
+            for _ in range(hashing_pool.max_pending):
+                hashing_pool._slots.release()
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_login_upgrades_iterations(self):
+        """Test a login re-hashes the password with the new cost."""
+        self.assertIn('$1000$', self.user.password)
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post(reverse('user:token'), {
+                'email': 'test@example.com', 'password': 'testpass123'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('testpass123'))
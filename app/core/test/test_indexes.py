@@ -0,0 +1,146 @@
+"""
+Test cases for the database indexes and constraints on core models.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import IntegrityError, connection
+from django.db.models.functions import Lower
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe, Tag
+
+
+class IndexUsageTests(TestCase):
+    """Test the API's access patterns are served by the composite indexes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'index@example.com', 'testpass123')
+        # Tiny test tables would otherwise always be read sequentially.
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+    def _add_ingredients(self, count):
+        """Create ingredients and refresh planner statistics for them."""
+        Ingredient.objects.bulk_create(
+            Ingredient(user=self.user, name=f'Ingredient {i}')
+            for i in range(count))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_ingredient')
+
+    def _add_tags(self, count):
+        """Create tags and refresh planner statistics for them.
+
+        Bitmap scans are turned off for the rest of the test, as they
+        can never return rows in index order.
+        """
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'Tag {i}', recipe_count=i % 7)
+            for i in range(count))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_tag')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test listing a user's recipes newest first uses the index."""
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5,
+                              price=Decimal('1.00'))
+
+        plan = Recipe.objects.filter(
+            user=self.user).order_by('-id')[:50].explain()
+
+        self.assertIn('recipe_user_id_idx', plan)
+
+    def test_tag_list_uses_name_index(self):
+        """Test listing a user's tags by name uses the unique index."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self._add_tags(1000)
+
+        plan = Tag.objects.filter(
+            user=self.user).order_by('-name')[:50].explain()
+
+        self.assertIn('unique_tag_name_per_user', plan)
+
+    def test_ingredient_lookup_uses_name_index(self):
+        """Test looking an ingredient up by name uses the unique index."""
+        Ingredient.objects.create(user=self.user, name='Salt')
+        self._add_ingredients(200)
+
+        plan = Ingredient.objects.filter(
+            user=self.user, name='Salt').explain()
+
+        self.assertIn('unique_ingredient_name_per_user', plan)
+
+    def test_ingredient_prefix_uses_prefix_index(self):
+        """Test matching a case-insensitive name prefix uses the index."""
+        Ingredient.objects.create(user=self.user, name='Salt')
+        self._add_ingredients(200)
+
+        plan = Ingredient.objects.annotate(name_lower=Lower('name')).filter(
+            user=self.user, name_lower__startswith='sa').explain()
+
+        self.assertIn('ingredient_name_prefix_idx', plan)
+
+    def test_tag_word_prefix_uses_gin_index(self):
+        """Test matching word prefixes within tag names uses the index."""
+        Tag.objects.create(user=self.user, name='Peanut Butter')
+
+        plan = Tag.objects.annotate(
+            words=SearchVector('name', config='simple')
+        ).filter(
+            words=SearchQuery('but:*', search_type='raw', config='simple')
+        ).explain()
+
+        self.assertIn('tag_name_words_idx', plan)
+
+    def test_tag_popularity_uses_index(self):
+        """Test listing tags by popularity is an index scan."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self._add_tags(1000)
+
+        plan = Tag.objects.filter(user=self.user).order_by(
+            '-recipe_count', '-name')[:50].explain()
+
+        self.assertIn('tag_popularity_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_recipe_search_uses_gin_index(self):
+        """Test full-text recipe search uses the GIN index."""
+        Recipe.objects.create(user=self.user, title='Lentil Soup',
+                              time_minutes=5, price=Decimal('1.00'))
+
+        plan = Recipe.objects.filter(
+            search_vector=SearchQuery('soup', config='english')).explain()
+
+        self.assertIn('recipe_search_vector_idx', plan)
+
+
+class UniqueNameTests(TestCase):
+    """Test tag and ingredient names are unique per user."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'unique@example.com', 'testpass123')
+
+    def test_duplicate_tag_name_rejected(self):
+        """Test a user cannot have two tags with the same name."""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(user=self.user, name='Vegan')
+
+    def test_same_name_for_different_users(self):
+        """Test different users may use the same ingredient name."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        Ingredient.objects.create(user=self.user, name='Salt')
+
+        Ingredient.objects.create(user=other, name='Salt')
+
+        self.assertEqual(Ingredient.objects.filter(name='Salt').count(), 2)
@@ -13,6 +13,7 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 def detail_url(ingredient_id):
@@ -134,3 +135,35 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_ingredients(self):
+        """Test autocomplete matches whole names, then words."""
+        Ingredient.objects.create(user=self.user, name='Green Pepper')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+        Ingredient.objects.create(user=self.user, name='Salt')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pep'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [i['name'] for i in res.data]
+        self.assertEqual(names, ['Pepper', 'Green Pepper'])
+
+    def test_autocomplete_invalid_limit(self):
+        """Test a non-numeric limit is rejected."""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pep', 'limit': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ingredients_with_counts(self):
+        """Test listing ingredients with their recipe counts."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for i in range(2):
+            recipe = Recipe.objects.create(
+                title=f'Recipe {i}', time_minutes=5,
+                price=Decimal('1.00'), user=self.user)
+            recipe.ingredients.add(salt)
+
+        res = self.client.get(INGREDIENTS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['recipe_count'], 2)
@@ -0,0 +1,114 @@
+"""
+Test cases for the metrics API.
+"""
+from unittest.mock import PropertyMock, patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import database_stats
+
+
+METRICS_URL = reverse('metrics')
+
+
+class MetricsApiTests(TestCase):
+    """Test the metrics API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_required(self):
+        """Test that non-staff users cannot read metrics."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_retrieve_metrics(self):
+        """Test staff users can read registered metrics."""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('recipe_list_cache', res.data)
+        self.assertIn('hits', res.data['recipe_list_cache'])
+
+    def test_database_metrics(self):
+        """Test connection settings are reported without a pool."""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        database = res.data['database']['default']
+        self.assertEqual(database['mode'], 'persistent')
+        self.assertEqual(
+            database['max_age'], connection.settings_dict['CONN_MAX_AGE'])
+
+    def test_database_pool_metrics(self):
+        """Test pool utilization is reported when pooling."""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+        pool = type('Pool', (), {'get_stats': lambda self: {
+            'pool_min': 1, 'pool_max': 4, 'pool_size': 3,
+            'pool_available': 1, 'requests_waiting': 0,
+            'connections_num': 5,
+        }})()
+
+        with patch.object(type(connections['default']), 'pool',
+                          new_callable=PropertyMock, return_value=pool):
+            res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.data['database']['default'], {
+            'mode': 'pool', 'size': 3, 'max_size': 4, 'in_use': 2,
+            'available': 1, 'waiting': 0, 'utilization': 0.5,
+            'wait_ms': 0, 'timeouts': 0, 'lost': 0, 'opened': 5,
+        })
+
+
+class PooledConnectionTests(TestCase):
+    """Test pool utilization on a real pooled connection."""
+
+    def setUp(self):
+        settings_dict = {
+            **connection.settings_dict,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                **connection.settings_dict['OPTIONS'],
+                'pool': {'min_size': 1, 'max_size': 2, 'timeout': 5},
+            },
+        }
+        self.pooled = DatabaseWrapper(settings_dict, alias='pooled')
+        # contrib.postgres looks new connections up by alias.
+        connections['pooled'] = self.pooled
+        self.addCleanup(connections.__delitem__, 'pooled')
+        self.addCleanup(self.pooled.close_pool)
+
+    def test_pool_stats(self):
+        """Test checked out connections count as in use."""
+        with self.pooled.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.pooled.pool.wait()
+            busy = database_stats(self.pooled)
+        self.pooled.close()
+        idle = database_stats(self.pooled)
+
+        self.assertEqual(busy['mode'], 'pool')
+        self.assertEqual(busy['max_size'], 2)
+        self.assertEqual(busy['in_use'], 1)
+        self.assertEqual(busy['utilization'], 0.5)
+        self.assertEqual(idle['in_use'], 0)
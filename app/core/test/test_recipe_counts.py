@@ -0,0 +1,96 @@
+"""
+Test cases for the trigger-maintained recipe counts.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe, Tag
+
+
+class RecipeCountTests(TestCase):
+    """Test tag and ingredient recipe counts follow link changes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'counts@example.com', 'testpass123')
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.other_tag = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+    def create_recipe(self, title='Soup'):
+        """Create and return a recipe for the test user."""
+        return Recipe.objects.create(user=self.user, title=title,
+                                     time_minutes=5, price=Decimal('1.00'))
+
+    def assertCount(self, obj, expected):
+        """Assert the stored recipe count of a tag or ingredient."""
+        obj.refresh_from_db()
+        self.assertEqual(obj.recipe_count, expected)
+
+    def test_counts_follow_add_and_remove(self):
+        """Test linking and unlinking recipes updates the counts."""
+        recipes = [self.create_recipe(f'Recipe {i}') for i in range(3)]
+        for recipe in recipes:
+            recipe.tags.add(self.tag, self.other_tag)
+            recipe.ingredients.add(self.salt)
+
+        recipes[0].tags.remove(self.tag)
+        recipes[1].tags.set([self.other_tag])
+
+        self.assertCount(self.tag, 1)
+        self.assertCount(self.other_tag, 3)
+        self.assertCount(self.salt, 3)
+
+    def test_save_keeps_concurrent_count(self):
+        """Test saving a stale instance does not overwrite the count."""
+        stale = Tag.objects.get(id=self.tag.id)
+        self.create_recipe().tags.add(self.tag)
+
+        stale.name = 'Plant based'
+        stale.save()
+
+        self.assertCount(self.tag, 1)
+        self.assertEqual(self.tag.name, 'Plant based')
+
+    def test_counts_follow_bulk_links(self):
+        """Test links inserted in bulk are counted."""
+        through = Recipe.tags.through
+        recipes = [self.create_recipe(f'Recipe {i}') for i in range(4)]
+
+        through.objects.bulk_create(
+            through(recipe_id=recipe.id, tag_id=self.tag.id)
+            for recipe in recipes)
+
+        self.assertCount(self.tag, 4)
+
+    def test_counts_follow_recipe_delete(self):
+        """Test deleting recipes decrements their items' counts."""
+        keep = self.create_recipe('Keep')
+        drop = self.create_recipe('Drop')
+        for recipe in (keep, drop):
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.salt)
+
+        Recipe.objects.filter(id=drop.id).delete()
+
+        self.assertCount(self.tag, 1)
+        self.assertCount(self.salt, 1)
+
+    def test_rebuild_recipe_counts(self):
+        """Test the rebuild command repairs counts that drifted."""
+        recipe = self.create_recipe()
+        recipe.tags.add(self.tag)
+        Tag.objects.filter(id=self.tag.id).update(recipe_count=7)
+        Ingredient.objects.filter(id=self.salt.id).update(recipe_count=2)
+        out = StringIO()
+
+        call_command('rebuild_recipe_counts', stdout=out)
+
+        self.assertCount(self.tag, 1)
+        self.assertCount(self.other_tag, 0)
+        self.assertCount(self.salt, 0)
+        self.assertIn('Fixed 1 tag counts.', out.getvalue())
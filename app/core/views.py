@@ -0,0 +1,23 @@
+"""
+Views for the core app.
+"""
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+
+from core import metrics
+from user.authentication import SignedTokenAuthentication
+
+
+class MetricsView(APIView):
+    """Report runtime metrics to staff users."""
+    authentication_classes = [SignedTokenAuthentication, TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Return all registered metrics."""
+        return Response(metrics.collect_all())
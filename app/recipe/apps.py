@@ -4,3 +4,28 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from django.db.models.signals import (m2m_changed, post_delete,
+                                              post_save, pre_delete)
+
+        from core import metrics
+        from core.models import Ingredient, Recipe, Tag
+        from recipe import signals
+        from recipe.cache import (autocomplete_cache, recipe_list_cache,
+                                  recipe_stats_cache, shopping_list_cache)
+        from recipe.similarity import similarity_indexes
+
+        metrics.register('recipe_list_cache', recipe_list_cache.stats)
+        metrics.register('autocomplete_cache', autocomplete_cache.stats)
+        metrics.register('recipe_stats_cache', recipe_stats_cache.stats)
+        metrics.register('shopping_list_cache', shopping_list_cache.stats)
+        metrics.register('similarity_indexes', similarity_indexes.stats)
+
+        for model in (Recipe, Tag, Ingredient):
+            post_save.connect(signals.object_saved, sender=model)
+        post_delete.connect(signals.recipe_deleted, sender=Recipe)
+        for model in (Tag, Ingredient):
+            pre_delete.connect(signals.attr_deleting, sender=model)
+        for through in (Recipe.tags.through, Recipe.ingredients.through):
+            m2m_changed.connect(signals.links_changed, sender=through)
@@ -0,0 +1,138 @@
+"""
+Async read-only views for recipes, tags and ingredients.
+
+Under an ASGI server these hand the worker back to the event loop while
+they wait on PostgreSQL, so one process keeps many reads in flight. They
+build their querysets and serializers with the viewsets in recipe.views,
+so filters, ordering and sparse fieldsets behave the same. Pagination,
+response caching and conditional requests stay on the synchronous views.
+"""
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from recipe import views
+from user.authentication import SignedTokenAuthentication
+
+
+_db_slots = weakref.WeakKeyDictionary()
+
+
+def _close_connections():
+    """Close this thread's connections, unless inside a transaction."""
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+class _DatabaseSlot:
+    """Bound the requests of an event loop holding a connection at once.
+
+    The async ORM runs each request's queries on a thread of its own,
+    with a connection of its own, so without a bound a burst of requests
+    would open as many connections as there are requests in flight. The
+    connection is closed on leaving, rather than when the response has
+    been sent, so that the next request can open one.
+    """
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        if loop not in _db_slots:
+            _db_slots[loop] = asyncio.Semaphore(
+                settings.ASYNC_DB_CONCURRENCY)
+        self.semaphore = _db_slots[loop]
+        await self.semaphore.acquire()
+
+    async def __aexit__(self, *exc_info):
+        try:
+            await sync_to_async(_close_connections)()
+        finally:
+            self.semaphore.release()
+
+
+async def _authenticate(request):
+    """Return the user a request authenticates as, or None."""
+    # Signed tokens are checked without a query, so they skip the thread
+    # hop that the token table lookup needs.
+    result = SignedTokenAuthentication().authenticate(request)
+    if result is None:
+        async with _DatabaseSlot():
+            result = await sync_to_async(
+                TokenAuthentication().authenticate)(request)
+
+    return result[0] if result else None
+
+
+class AsyncReadView(View):
+    """List or retrieve the objects of a viewset asynchronously."""
+    viewset_class = None
+
+    def _viewset(self, request, user, action, pk):
+        """Return a viewset instance set up for a request."""
+        drf_request = Request(request)
+        drf_request.user = user
+        kwargs = {} if pk is None else {'pk': pk}
+
+        return self.viewset_class(
+            request=drf_request, args=(), kwargs=kwargs, action=action,
+            format_kwarg=None)
+
+    async def get(self, request, pk=None):
+        try:
+            user = await _authenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+
+            viewset = self._viewset(
+                request, user, 'list' if pk is None else 'retrieve', pk)
+            queryset = viewset.get_queryset()
+            async with _DatabaseSlot():
+                if pk is None:
+                    objs = [obj async for obj in queryset]
+                else:
+                    objs = await queryset.filter(pk=pk).afirst()
+            if objs is None:
+                raise exceptions.NotFound()
+            data = viewset.get_serializer(objs, many=pk is None).data
+        except exceptions.APIException as exc:
+            return self._error(exc)
+
+        return HttpResponse(
+            JSONRenderer().render(data), content_type='application/json')
+
+    def _error(self, exc):
+        """Return the JSON error response DRF would send."""
+        response = HttpResponse(
+            JSONRenderer().render(
+                exc.detail if isinstance(exc.detail, (list, dict))
+                else {'detail': exc.detail}),
+            content_type='application/json', status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated,
+                            exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = SignedTokenAuthentication.keyword
+
+        return response
+
+
+class RecipeReadView(AsyncReadView):
+    """Async list and detail of the authenticated user's recipes."""
+    viewset_class = views.RecipeViewSet
+
+
+class TagReadView(AsyncReadView):
+    """Async list and detail of the authenticated user's tags."""
+    viewset_class = views.TagViewSet
+
+
+class IngredientReadView(AsyncReadView):
+    """Async list and detail of the authenticated user's ingredients."""
+    viewset_class = views.IngredientViewSet
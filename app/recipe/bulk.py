@@ -0,0 +1,140 @@
+"""
+Set-based helpers for creating and changing many recipes at once.
+"""
+from django.db import transaction
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import bump_data_version
+from recipe.similarity import record_changes
+
+BATCH_SIZE = 1000
+
+
+def resolve_names(model, user, names):
+    """Return a mapping of name to id, creating any missing names.
+
+    Works in at most three queries however many names are given: one to
+    find existing rows, one bulk insert, and one to read back the ids of
+    rows that were created (or inserted concurrently by another request).
+    """
+    names = set(names)
+    if not names:
+        return {}
+
+    ids = dict(model.objects.filter(
+        user=user, name__in=names).values_list('name', 'id'))
+    missing = names - ids.keys()
+    if missing:
+        model.objects.bulk_create(
+            (model(user=user, name=name) for name in missing),
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        ids.update(model.objects.filter(
+            user=user, name__in=missing).values_list('name', 'id'))
+
+    return ids
+
+
+def _link_rows(through, column, user, model, recipes, items, key):
+    """Return join table rows linking recipes to their named items."""
+    ids = resolve_names(model, user, (
+        entry['name'] for item in items for entry in item.get(key, [])))
+    rows = []
+    for recipe, item in zip(recipes, items):
+        linked = {ids[entry['name']] for entry in item.get(key, [])}
+        rows.extend(through(recipe_id=recipe.id, **{column: related_id})
+                    for related_id in linked)
+
+    return rows
+
+
+def create_recipes(user, items):
+    """Create recipes from validated data in one transaction.
+
+    Recipes and their tag and ingredient links are bulk inserted, and all
+    names are resolved with ``resolve_names``. Returns the new recipes in
+    the order of ``items``.
+    """
+    tag_links = Recipe.tags.through
+    ingredient_links = Recipe.ingredients.through
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(
+            (Recipe(user=user, **{
+                field: value for field, value in item.items()
+                if field not in ('tags', 'ingredients')
+            }) for item in items),
+            batch_size=BATCH_SIZE)
+        tag_links.objects.bulk_create(
+            _link_rows(tag_links, 'tag_id', user, Tag, recipes, items,
+                       'tags'),
+            batch_size=BATCH_SIZE)
+        ingredient_links.objects.bulk_create(
+            _link_rows(ingredient_links, 'ingredient_id', user, Ingredient,
+                       recipes, items, 'ingredients'),
+            batch_size=BATCH_SIZE)
+        bump_data_version(user)
+        record_changes(user, [recipe.id for recipe in recipes])
+
+    return recipes
+
+
+def _locked_ids(user, ids):
+    """Return which of the ids are the user's recipes, locking them."""
+    recipes = Recipe.objects.filter(user=user, id__in=ids)
+
+    return set(recipes.select_for_update().values_list('id', flat=True))
+
+
+def update_recipes(user, ids, data):
+    """Apply the same field values to many recipes with one UPDATE.
+
+    Returns the ids that belonged to the user and were updated.
+    """
+    with transaction.atomic():
+        found = _locked_ids(user, ids)
+        if found:
+            Recipe.objects.filter(id__in=found).update(**data)
+            bump_data_version(user)
+
+    return found
+
+
+def delete_recipes(user, ids):
+    """Delete many recipes and their links.
+
+    Returns the ids that belonged to the user and were deleted.
+    """
+    with transaction.atomic():
+        found = _locked_ids(user, ids)
+        if found:
+            Recipe.objects.filter(id__in=found).delete()
+
+    return found
+
+
+def change_tags(user, ids, add=(), remove=()):
+    """Add and remove tags by name on many recipes at once.
+
+    Added tags are created if needed and linked with one insert that skips
+    existing links; removed tags are unlinked with one delete. Returns the
+    ids that belonged to the user.
+    """
+    through = Recipe.tags.through
+    with transaction.atomic():
+        found = _locked_ids(user, ids)
+        if not found:
+            return found
+
+        if remove:
+            through.objects.filter(
+                recipe_id__in=found, tag__user=user, tag__name__in=remove,
+            ).delete()
+        if add:
+            tag_ids = resolve_names(Tag, user, add).values()
+            through.objects.bulk_create(
+                (through(recipe_id=recipe_id, tag_id=tag_id)
+                 for recipe_id in found for tag_id in tag_ids),
+                batch_size=BATCH_SIZE, ignore_conflicts=True)
+        bump_data_version(user)
+        record_changes(user, found)
+
+    return found
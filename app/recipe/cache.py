@@ -0,0 +1,159 @@
+"""
+Caching helpers for the recipe API.
+
+Every user has a data version that is bumped whenever they write recipes,
+tags or ingredients. Cache keys embed that version, so a write makes all
+of the user's cached entries unreachable and they simply age out.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(user_id):
+    """Return the cache key holding a user's data version."""
+    return f'recipe:version:{user_id}'
+
+
+def _bump(user_id):
+    """Increment a user's data version in the cache."""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # Start from a timestamp so an evicted version can never come back
+        # as a value that older entries were cached under.
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def get_data_version(user):
+    """Return the current data version for a user."""
+    return cache.get_or_set(
+        _version_key(user.pk), time.time_ns, timeout=None)
+
+
+def bump_data_version(user):
+    """Invalidate everything cached for a user.
+
+    The version is bumped straight away, so the writing request never
+    reads its own stale data, and again on commit, so anything a concurrent
+    reader cached from the pre-commit state is discarded as well.
+    """
+    user_id = user.pk
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+class ResponseCache:
+    """Cache of serialized response data keyed on user, query and version."""
+
+    def __init__(self, prefix, timeout):
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def key(self, request, params=None):
+        """Return the cache key for a request.
+
+        ``params`` replaces the query parameters in the key, for views
+        whose parameters have a canonical form. Take the key before
+        querying, and store the result under that same key: a write
+        committing in between then leaves the result unreachable rather
+        than filed under the new version.
+        """
+        if params is None:
+            params = sorted(request.query_params.lists())
+        digest = hashlib.sha1(
+            repr((request.get_host(), request.path, params)).encode()
+        ).hexdigest()
+        version = get_data_version(request.user)
+
+        return f'{self.prefix}:{request.user.pk}:{version}:{digest}'
+
+    def _count(self, outcome):
+        """Increment the shared hit or miss counter."""
+        key = f'{self.prefix}:stats:{outcome}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+    def get(self, key):
+        """Return the cached data for a key, or None on a miss."""
+        data = cache.get(key)
+        self._count('hits' if data is not None else 'misses')
+
+        return data
+
+    def set(self, key, data):
+        """Store response data under a key taken before it was read."""
+        cache.set(key, data, timeout=self.timeout)
+
+    def stats(self):
+        """Return the hit and miss counters."""
+        hits = cache.get(f'{self.prefix}:stats:hits', 0)
+        misses = cache.get(f'{self.prefix}:stats:misses', 0)
+        total = hits + misses
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+
+recipe_list_cache = ResponseCache(
+    'recipe:list', settings.RECIPE_LIST_CACHE_TIMEOUT)
+recipe_stats_cache = ResponseCache(
+    'recipe:stats', settings.RECIPE_LIST_CACHE_TIMEOUT)
+shopping_list_cache = ResponseCache(
+    'recipe:shopping', settings.RECIPE_LIST_CACHE_TIMEOUT)
+
+
+class LocalLRUCache:
+    """Small in-process LRU cache with hit and miss counters.
+
+    Used for values cheap enough to recompute that a shared cache round
+    trip would cost more than it saves. Keys should embed the user's data
+    version so that writes never need to reach into other processes.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        """Return the size and hit/miss counters of this process's cache."""
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+autocomplete_cache = LocalLRUCache(settings.AUTOCOMPLETE_CACHE_ENTRIES)
@@ -0,0 +1,126 @@
+"""
+Streaming export of a user's recipes.
+
+Recipes are read through a server-side cursor in fixed-size chunks, and
+the tag and ingredient names of each chunk are fetched with one query per
+relation. Only one chunk is held in memory at a time, however large the
+collection is, under WSGI and, through AsyncStream, under ASGI.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from core.models import Recipe
+
+EXPORT_COLUMNS = ('id', 'title', 'time_minutes', 'price', 'description',
+                  'link')
+
+_DONE = object()
+
+
+def _related_names(through, column, recipe_ids):
+    """Return a mapping of recipe id to related names for a chunk."""
+    names = defaultdict(list)
+    links = through.objects.filter(recipe_id__in=recipe_ids).order_by(
+        f'{column}__name').values_list('recipe_id', f'{column}__name')
+    for recipe_id, name in links:
+        names[recipe_id].append(name)
+
+    return names
+
+
+def _add_related_names(chunk):
+    """Return a chunk of recipe rows with their related names added."""
+    recipe_ids = [row['id'] for row in chunk]
+    tags = _related_names(Recipe.tags.through, 'tag', recipe_ids)
+    ingredients = _related_names(
+        Recipe.ingredients.through, 'ingredient', recipe_ids)
+    for row in chunk:
+        row['price'] = str(row['price'])
+        row['tags'] = tags.get(row['id'], [])
+        row['ingredients'] = ingredients.get(row['id'], [])
+
+    return chunk
+
+
+def iter_recipe_chunks(queryset, chunk_size):
+    """Yield lists of recipe dicts, including tag and ingredient names.
+
+    The cursor is read inside a transaction. Outside one, PostgreSQL has
+    to materialize the whole result set before the first fetch.
+    """
+    with transaction.atomic(savepoint=False):
+        rows = queryset.values(*EXPORT_COLUMNS).iterator(
+            chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield _add_related_names(chunk)
+
+
+def iter_ndjson(queryset, chunk_size):
+    """Yield recipes as newline-delimited JSON, one chunk at a time.
+
+    Tags and ingredients use the same ``[{"name": ...}]`` shape as the
+    recipe API, so exported lines can be posted back unchanged.
+    """
+    for chunk in iter_recipe_chunks(queryset, chunk_size):
+        lines = []
+        for row in chunk:
+            row['tags'] = [{'name': name} for name in row['tags']]
+            row['ingredients'] = [
+                {'name': name} for name in row['ingredients']]
+            lines.append(json.dumps(row, ensure_ascii=False))
+
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+def iter_csv(queryset, chunk_size):
+    """Yield recipes as CSV, with related names joined by ``;``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS + ('tags', 'ingredients'))
+    for chunk in iter_recipe_chunks(queryset, chunk_size):
+        for row in chunk:
+            writer.writerow([row[column] for column in EXPORT_COLUMNS] + [
+                ';'.join(row['tags']), ';'.join(row['ingredients'])])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class AsyncStream:
+    """Serve a synchronous stream to an ASGI server part by part.
+
+    Given a sync iterator, StreamingHttpResponse under ASGI reads it to
+    the end before sending anything. Each part is instead fetched with a
+    thread-sensitive call, so the parts are read on the request's thread,
+    which holds the export's cursor and transaction. The response calls
+    close() on that thread too, ending the transaction of an aborted
+    download.
+    """
+
+    def __init__(self, iterator):
+        self._iterator = iter(iterator)
+        self._next = sync_to_async(next)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        part = await self._next(self._iterator, _DONE)
+        if part is _DONE:
+            raise StopAsyncIteration
+        return part
+
+    def close(self):
+        """Close the underlying iterator."""
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            close()
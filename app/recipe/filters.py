@@ -0,0 +1,40 @@
+"""
+Query helpers for filtering recipes.
+"""
+from django.db.models import Count, Exists, OuterRef
+
+from core.models import Recipe
+
+
+def _filter_related(queryset, through, column, ids, match_all):
+    """Filter recipes on a many-to-many relation using a semi-join.
+
+    The condition is an ``EXISTS`` or ``IN`` against the join table, so
+    recipes are never fanned out into one row per matching link and no
+    ``DISTINCT`` is needed to de-duplicate them.
+    """
+    wanted = set(ids)
+    links = through.objects.filter(**{f'{column}__in': wanted})
+    if not match_all:
+        return queryset.filter(
+            Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+    # Links are unique per (recipe, related) pair, so a recipe has every
+    # requested item exactly when it has that many matching links.
+    complete = links.values('recipe_id').annotate(
+        matched=Count('*')).filter(matched=len(wanted))
+    return queryset.filter(pk__in=complete.values('recipe_id'))
+
+
+def filter_recipes(queryset, tag_ids=None, ingredient_ids=None,
+                   match_all=False):
+    """Return recipes having any (or all) of the given tags/ingredients."""
+    if tag_ids:
+        queryset = _filter_related(
+            queryset, Recipe.tags.through, 'tag_id', tag_ids, match_all)
+    if ingredient_ids:
+        queryset = _filter_related(
+            queryset, Recipe.ingredients.through, 'ingredient_id',
+            ingredient_ids, match_all)
+
+    return queryset
@@ -0,0 +1,218 @@
+"""
+Viewset mixins for the recipe API endpoints.
+"""
+import hashlib
+from urllib.parse import urlsplit
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from recipe.cache import get_data_version
+
+
+class PreconditionFailed(APIException):
+    """Raised when a write's If-Match does not match the current data."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since it was last fetched.'
+    default_code = 'precondition_failed'
+
+
+class NotModified(Exception):
+    """Raised to short-circuit a read the client already has."""
+
+    def __init__(self, etag):
+        super().__init__(etag)
+        self.etag = etag
+
+
+class ConditionalRequestMixin:
+    """Answer conditional requests from the user's data version.
+
+    ETags are built from the data version and the request URL instead of
+    a hash of the rendered body, so an unchanged resource is answered with
+    ``304 Not Modified`` before anything is serialized. Writes carrying an
+    ``If-Match`` other than their target's current ETag get ``412``.
+
+    Reads are tagged with the version read before their first query, so
+    a write committing while they run leaves their ETag already stale.
+    """
+    conditional_actions = ('list', 'retrieve', 'update', 'partial_update')
+    data_version = None
+
+    def _version_tag(self, request):
+        """Return the ETag prefix shared by all of a user's resources."""
+        version = self.data_version
+        if version is None:
+            version = get_data_version(request.user)
+
+        return f'{request.user.pk}-{version}'
+
+    def get_etag(self, request, path=None):
+        """Return the strong ETag for a resource of the current user.
+
+        ``path`` defaults to the request's own path and query string.
+        """
+        path = request.get_full_path() if path is None else path
+        digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+
+        return f'"{self._version_tag(request)}-{digest}"'
+
+    def _target_etag(self, request):
+        """Return the ETag a write's target currently has.
+
+        Detail writes target the object's URL, any other write the
+        unfiltered list it changes.
+        """
+        if self.detail:
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            url = self.reverse_action(
+                'detail', kwargs={lookup: self.kwargs[lookup]})
+        else:
+            url = self.reverse_action('list')
+
+        return self.get_etag(request, urlsplit(url).path)
+
+    def _request_etags(self, request, header):
+        """Return the ETags from a conditional request header."""
+        value = request.headers.get(header)
+        if value is None:
+            return None
+
+        return [etag.removeprefix('W/') for etag in parse_etags(value)]
+
+    def check_preconditions(self, request):
+        """Answer If-None-Match with 304 and refuse a failed If-Match."""
+        if getattr(self, '_preconditions_checked', False):
+            return
+        self._preconditions_checked = True
+
+        if request.method in ('GET', 'HEAD'):
+            etags = self._request_etags(request, 'If-None-Match')
+            if etags is None or self.action not in ('list', 'retrieve'):
+                return
+            etag = self.get_etag(request)
+            if '*' in etags or etag in etags:
+                raise NotModified(etag)
+        elif request.method != 'OPTIONS':
+            etags = self._request_etags(request, 'If-Match')
+            if etags is None or '*' in etags:
+                return
+            if self._target_etag(request) not in etags:
+                raise PreconditionFailed()
+
+    def initial(self, request, *args, **kwargs):
+        """Check conditional headers on lists once authenticated."""
+        super().initial(request, *args, **kwargs)
+        self.data_version = get_data_version(request.user)
+
+        # Detail requests are checked by get_object(), so that a missing
+        # object is answered with 404 whatever the headers say.
+        if not self.detail:
+            self.check_preconditions(request)
+
+    def get_object(self):
+        """Return the object, then check conditional headers against it."""
+        obj = super().get_object()
+        self.check_preconditions(self.request)
+
+        return obj
+
+    def handle_exception(self, exc):
+        """Answer with 304 when the client's copy is current."""
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': exc.etag})
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Tag successful reads and updates with their current ETag."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and self.action in self.conditional_actions):
+            if request.method not in ('GET', 'HEAD'):
+                # An update's body is the data after its own write.
+                self.data_version = None
+            response['ETag'] = self.get_etag(request)
+
+        return response
+
+
+class CachedListMixin:
+    """Serve repeat list requests from a ``ResponseCache``."""
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        """List objects, answering repeat reads from the response cache."""
+        key = self.list_cache.key(request)
+        data = self.list_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        self.list_cache.set(key, response.data)
+        return response
+
+
+class SparseFieldsMixin:
+    """Trim reads to the fields named in ``?fields=`` and ``?expand=``.
+
+    ``?fields=id,title`` returns only those fields and loads only their
+    columns. Nested relations listed in ``expandable_fields`` are left out
+    unless named in ``fields`` or ``expand``, and are then prefetched.
+    Without ``?fields=`` every field is returned as before. Serializer
+    field names are expected to match the model's.
+    """
+    expandable_fields = ()
+
+    def _param_names(self, name):
+        """Return the comma separated names in a query parameter."""
+        value = self.request.query_params.get(name, '')
+
+        return [part.strip() for part in value.split(',') if part.strip()]
+
+    def get_requested_fields(self):
+        """Return the field names to render, or None for all of them."""
+        if (self.request.method not in ('GET', 'HEAD')
+                or 'fields' not in self.request.query_params):
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        fields = self._param_names('fields')
+        expand = self._param_names('expand')
+        errors = {}
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            errors['fields'] = [f'Unknown field: {name}.' for name in unknown]
+        unknown = [name for name in expand
+                   if name not in self.expandable_fields]
+        if unknown:
+            errors['expand'] = [f'Cannot expand: {name}.' for name in unknown]
+        if errors:
+            raise ValidationError(errors)
+
+        return [name for name in available if name in fields + expand]
+
+    def project_queryset(self, queryset):
+        """Return the queryset narrowed to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset.prefetch_related(*self.expandable_fields)
+
+        columns = [name for name in fields
+                   if name not in self.expandable_fields]
+        relations = [name for name in self.expandable_fields
+                     if name in fields]
+
+        return queryset.only('id', *columns).prefetch_related(*relations)
+
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer limited to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,129 @@
+"""
+Pagination classes for the recipe API endpoints.
+"""
+import json
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """Keyset pagination that clients opt in to.
+
+    Pagination only applies when the request carries a ``cursor`` or
+    ``page_size`` query parameter; otherwise the whole collection is
+    returned as before. Each page is fetched with a ``WHERE`` on the
+    ordering columns rather than an ``OFFSET``, so deep pages cost the same
+    as the first one.
+
+    Cursors hold the values of every ordering column, not just the first
+    as in DRF, so orderings with many ties (popularity, search rank) stay
+    keyset paginated down to their unique tie-breaker. The last ordering
+    column must be unique.
+    """
+    page_size = settings.RECIPE_API_PAGE_SIZE
+    max_page_size = settings.RECIPE_API_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        """Return the page size, or None when pagination isn't requested."""
+        params = request.query_params
+        if (self.cursor_query_param not in params
+                and self.page_size_query_param not in params):
+            return None
+
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        """Paginate on the ordering the view applies to its queryset."""
+        if hasattr(view, 'get_ordering'):
+            return tuple(view.get_ordering())
+
+        return (getattr(view, 'ordering', self.ordering),)
+
+    def _position_filter(self, position, reverse):
+        """Return the condition for rows after a position.
+
+        A row follows when it equals the position on some leading columns
+        and comes after it on the next one.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        equal = Q()
+        for order, value in zip(self.ordering, values):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') != reverse else 'gt'
+            conditions.append(equal & Q(**{f'{field}__{lookup}': value}))
+            equal &= Q(**{field: value})
+
+        return reduce(operator.or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page, positioned on all of the ordering columns."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                order[1:] if order.startswith('-') else f'-{order}'
+                for order in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self._position_filter(current_position, reverse))
+
+        # One extra row tells whether another page follows.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Return the values of all ordering columns of a row."""
+        values = []
+        for order in ordering:
+            field = order.lstrip('-')
+            value = (instance[field] if isinstance(instance, dict)
+                     else getattr(instance, field))
+            values.append(str(value))
+
+        return json.dumps(values, separators=(',', ':'))
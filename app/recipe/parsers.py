@@ -0,0 +1,77 @@
+"""
+Request parsers for the recipe API endpoints.
+"""
+import gzip
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import BaseParser
+
+
+class RequestTooLarge(APIException):
+    """Raised when a request body exceeds the size the endpoint accepts."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Request body too large.'
+    default_code = 'request_too_large'
+
+
+def _bounded_lines(stream, limit):
+    """Yield the lines of a stream, reading at most limit bytes.
+
+    Each read asks for no more than the remaining budget plus one byte,
+    so neither a long line nor a highly compressed body is ever held in
+    memory beyond the limit.
+    """
+    read = 0
+    while True:
+        line = stream.readline(limit - read + 1)
+        if not line:
+            return
+        read += len(line)
+        if read > limit:
+            raise RequestTooLarge(
+                f'At most {limit} bytes may be sent at once.')
+        yield line
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list, optionally gzipped.
+
+    The body is read line by line, so parsing stops as soon as more than
+    ``RECIPE_BULK_MAX_ITEMS`` items or, once decompressed,
+    ``RECIPE_BULK_MAX_BYTES`` bytes have been sent.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Return the list of JSON values in the request body."""
+        if stream is None:
+            return []
+
+        request = parser_context['request']
+        encoding = request.headers.get('Content-Encoding', 'identity')
+        if encoding == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream)
+        elif encoding != 'identity':
+            raise ParseError(f'Unsupported content encoding: {encoding}.')
+
+        items = []
+        try:
+            lines = _bounded_lines(stream, settings.RECIPE_BULK_MAX_BYTES)
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                if len(items) == settings.RECIPE_BULK_MAX_ITEMS:
+                    raise ParseError(
+                        'At most {} items may be sent at once.'.format(
+                            settings.RECIPE_BULK_MAX_ITEMS))
+                items.append(json.loads(line))
+        except ValueError as exc:
+            raise ParseError(f'Line {number}: {exc}')
+        except (OSError, EOFError, zlib.error) as exc:
+            raise ParseError(f'Invalid gzip stream: {exc}')
+
+        return items
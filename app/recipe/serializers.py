@@ -1,8 +1,13 @@
 """
 Serializers for recipe API endpoints.
 """
+from django.conf import settings
 from rest_framework import serializers
 from core.models import Ingredient, Recipe, Tag
+from recipe.bulk import resolve_names
+from recipe.cache import bump_data_version
+from recipe.similarity import (DEFAULT_LIMIT, MAX_LIMIT, MAX_MISSING,
+                               record_changes)
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -23,7 +28,34 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """Model serializer that can render a subset of its fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredients with the number of recipes using them."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
+
+
+class TagCountSerializer(TagSerializer):
+    """Serializer for tags with the number of recipes using them."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
+
+
+class RecipeSerializer(DynamicFieldsModelSerializer):
     """Serializer for recipe objects."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -34,23 +66,17 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'description', 'link', 'tags', 'ingredients')
         read_only_fields = ('id',)
 
-    def _get_or_create_tags(self, tags, recipe):
-        """Handle getting or creating tags as needed."""
+    def _get_or_create_tags(self, tags):
+        """Return the ids of the named tags, creating any missing ones."""
         auth_user = self.context['request'].user
-        for tag_data in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user, **tag_data
-            )
-            recipe.tags.add(tag_obj)
-
-    def _get_or_create_ingredients(self, ingredients, recipe):
-        """Handle getting or creating ingredients as needed."""
+        return resolve_names(
+            Tag, auth_user, (tag['name'] for tag in tags)).values()
+
+    def _get_or_create_ingredients(self, ingredients):
+        """Return the ids of the named ingredients, creating any missing."""
         auth_user = self.context['request'].user
-        for ingredient_data in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient_data
-            )
-            recipe.ingredients.add(ingredient_obj)
+        return resolve_names(Ingredient, auth_user, (
+            ingredient['name'] for ingredient in ingredients)).values()
 
     def create(self, validated_data):
         """Create and return a new recipe."""
@@ -59,8 +85,19 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         recipe = Recipe.objects.create(**validated_data)
 
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        # A new recipe has no links yet, so they are inserted directly
+        # rather than through add(), which would first look for existing
+        # ones to report in its signals; the change is logged here instead.
+        for relation, column, ids in (
+                ('tags', 'tag_id', self._get_or_create_tags(tags)),
+                ('ingredients', 'ingredient_id',
+                 self._get_or_create_ingredients(ingredients))):
+            through = getattr(Recipe, relation).through
+            through.objects.bulk_create(
+                through(recipe_id=recipe.id, **{column: related_id})
+                for related_id in ids)
+        bump_data_version(recipe.user)
+        record_changes(recipe.user, [recipe.id])
 
         return recipe
 
@@ -69,13 +106,13 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
 
+        # set() only inserts and deletes the links that actually change.
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_tags(tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(
+                self._get_or_create_ingredients(ingredients))
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -88,7 +125,7 @@ class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view."""
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ('description', 'image')
+        fields = RecipeSerializer.Meta.fields + ('image',)
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
@@ -99,3 +136,66 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         fields = ('id', 'image')
         read_only_fields = ('id',)
         extra_kwargs = {'image': {'required': 'True'}}
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of recipe ids."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        """Return the ids without duplicates, enforcing the batch limit."""
+        if len(value) > settings.RECIPE_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'At most {settings.RECIPE_BULK_MAX_ITEMS} ids may be sent '
+                'at once.')
+
+        return list(dict.fromkeys(value))
+
+
+class RecipeBatchUpdateSerializer(RecipeBatchSerializer):
+    """Serializer for applying the same changes to a batch of recipes."""
+    data = serializers.DictField()
+
+    update_fields = ('title', 'time_minutes', 'price', 'description',
+                     'link')
+
+    def validate_data(self, value):
+        """Return the validated recipe fields to update."""
+        unknown = set(value) - set(self.update_fields)
+        if unknown:
+            raise serializers.ValidationError(
+                'Only {} can be updated in bulk.'.format(
+                    ', '.join(self.update_fields)))
+        if not value:
+            raise serializers.ValidationError('No fields to update.')
+
+        recipe = RecipeSerializer(
+            data=value, partial=True, fields=self.update_fields)
+        recipe.is_valid(raise_exception=True)
+        return recipe.validated_data
+
+
+class RecipeBatchTagsSerializer(RecipeBatchSerializer):
+    """Serializer for adding and removing tags on a batch of recipes."""
+    add = TagSerializer(many=True, required=False)
+    remove = TagSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        """Flatten the tags to names and require at least one change."""
+        attrs['add'] = [tag['name'] for tag in attrs.get('add', [])]
+        attrs['remove'] = [tag['name'] for tag in attrs.get('remove', [])]
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError(
+                'Give tags to add or remove.')
+
+        return attrs
+
+
+class PantrySerializer(serializers.Serializer):
+    """Serializer for finding recipes cookable from a set of ingredients."""
+    ingredients = serializers.ListField(child=serializers.IntegerField())
+    max_missing = serializers.IntegerField(
+        min_value=0, max_value=MAX_MISSING, default=0)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT)
@@ -0,0 +1,30 @@
+"""
+Shopping lists merging the ingredients of several recipes.
+"""
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import F
+
+from core.models import Recipe
+
+MAX_RECIPES = 100
+
+
+def shopping_list(user, recipe_ids):
+    """Return each ingredient of the recipes once, with its recipe ids.
+
+    The list is built by one grouped query over the recipe-ingredient
+    links; ids of recipes the user does not own are ignored.
+    """
+    links = Recipe.ingredients.through.objects.filter(
+        recipe__user=user, recipe_id__in=recipe_ids)
+    ingredients = links.values(
+        'ingredient_id', name=F('ingredient__name'),
+    ).annotate(
+        recipes=ArrayAgg('recipe_id', order_by='recipe_id'),
+    ).order_by('name')
+
+    return [{
+        'id': ingredient['ingredient_id'],
+        'name': ingredient['name'],
+        'recipes': ingredient['recipes'],
+    } for ingredient in ingredients]
@@ -0,0 +1,85 @@
+"""
+Invalidate cached recipe data on every ORM write.
+
+The API's own writes, the admin and any other code saving or deleting
+recipes, tags and ingredients or changing a recipe's links all bump the
+owner's data version and log the recipes whose similarity features
+changed. Bulk writes the ORM sends no signals for (``bulk_create()``,
+``update()`` and deletes on the link tables) still do both themselves.
+
+The objects of one ``delete()`` call are handled as a batch, so deleting
+many recipes costs one version bump and one change log entry per owner.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+
+from recipe.cache import bump_data_version
+from recipe.similarity import record_changes
+
+
+class _DeleteBatch(threading.local):
+    """The owners and recipes of the delete() call being signalled."""
+    origin = None
+    changes = None
+
+
+_batch = _DeleteBatch()
+
+
+def _owner(user_id):
+    """Return a user to key cached data on, without loading it."""
+    return get_user_model()(pk=user_id)
+
+
+def _changed(user_id, recipe_ids=()):
+    """Invalidate a user's data after a write to some of their recipes."""
+    user = _owner(user_id)
+    bump_data_version(user)
+    if recipe_ids:
+        record_changes(user, recipe_ids)
+
+
+def _deleted(origin, user_id, recipe_ids=()):
+    """Invalidate a user's data once per delete() call."""
+    if origin is None or origin is not _batch.origin:
+        _batch.origin = origin
+        _batch.changes = {}
+    changes = _batch.changes.get(user_id)
+    if changes is None:
+        # The change log reads the ids on commit, by which time the rest
+        # of the batch has been added.
+        changes = _batch.changes[user_id] = set()
+        user = _owner(user_id)
+        bump_data_version(user)
+        record_changes(user, changes)
+    changes.update(recipe_ids)
+
+
+def object_saved(sender, instance, **kwargs):
+    """Invalidate the owner's data when a recipe, tag or ingredient saves."""
+    _changed(instance.user_id)
+
+
+def recipe_deleted(sender, instance, origin=None, **kwargs):
+    """Invalidate the owner's data and drop a deleted recipe's features."""
+    _deleted(origin, instance.user_id, [instance.pk])
+
+
+def attr_deleting(sender, instance, origin=None, **kwargs):
+    """Log the recipes losing a tag or ingredient about to be deleted."""
+    recipe_ids = instance.recipe_set.values_list('id', flat=True)
+    _deleted(origin, instance.user_id, list(recipe_ids))
+
+
+def links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Log the recipes whose tags or ingredients were added or removed."""
+    if not reverse:
+        if action in ('post_add', 'post_remove') and pk_set or (
+                action == 'post_clear'):
+            _changed(instance.user_id, [instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        _changed(instance.user_id, pk_set)
+    elif action == 'pre_clear':
+        _changed(instance.user_id, list(
+            instance.recipe_set.values_list('id', flat=True)))
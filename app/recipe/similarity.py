@@ -0,0 +1,373 @@
+"""
+In-process index of recipe similarity by shared ingredients and tags.
+
+Each recipe is reduced to a set of features (its ingredient and tag ids)
+and an inverted index maps every feature to a bitset of the recipes
+having it. The recipes similar to one recipe are found by adding up the
+bitsets of its own features and scoring only the recipes with the
+largest overlaps by the Jaccard index, instead of comparing it against
+the whole library. The same postings answer which recipes can be cooked
+from a pantry of ingredients, by counting the missing ingredients of
+every recipe at once.
+
+Indexes are built per user on first use and kept in an LRU bounded by
+users and by the memory of their postings. Writes log the ids of the
+recipes they changed in the shared cache on commit; every process
+applies the logged changes to its own copy before answering, and
+rebuilds from scratch only if the log was evicted or a write touched
+more recipes than is worth patching.
+"""
+import heapq
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Recipe
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_MISSING = 5
+# Changes to more recipes than this are applied with a rebuild.
+MAX_PATCH_RECIPES = 1000
+CHANGE_LOG_TIMEOUT = 24 * 60 * 60
+
+
+def _sequence_key(user_id):
+    """Return the cache key counting a user's logged changes."""
+    return f'recipe:similar:seq:{user_id}'
+
+
+def _change_key(user_id, sequence):
+    """Return the cache key of one logged change."""
+    return f'recipe:similar:change:{user_id}:{sequence}'
+
+
+def record_changes(user, recipe_ids):
+    """Log recipes whose ingredients or tags changed, once committed.
+
+    The ids are read on commit, so a caller may still add to a set passed
+    in until then.
+    """
+    user_id = user.pk
+
+    def log():
+        change = list(recipe_ids)
+        key = _sequence_key(user_id)
+        cache.add(key, 0, timeout=None)
+        try:
+            sequence = cache.incr(key)
+        except ValueError:
+            return
+        cache.set(_change_key(user_id, sequence), change,
+                  timeout=CHANGE_LOG_TIMEOUT)
+
+    transaction.on_commit(log)
+
+
+def _recipe_features(user, recipe_ids=None):
+    """Return a mapping of recipe id to its set of feature ids.
+
+    Ingredients map to even and tags to odd feature ids so that both
+    share one integer space.
+    """
+    features = defaultdict(set)
+    for relation, column, tag in (('ingredients', 'ingredient_id', 0),
+                                  ('tags', 'tag_id', 1)):
+        links = getattr(Recipe, relation).through.objects.filter(
+            recipe__user=user)
+        if recipe_ids is not None:
+            links = links.filter(recipe_id__in=recipe_ids)
+        for recipe_id, related_id in links.values_list(
+                'recipe_id', column).iterator(chunk_size=10000):
+            features[recipe_id].add(related_id * 2 + tag)
+
+    return features
+
+
+def _bit_positions(mask):
+    """Return the positions of the set bits of a non-negative integer."""
+    bits = bin(mask)[:1:-1]
+    positions = []
+    position = bits.find('1')
+    while position != -1:
+        positions.append(position)
+        position = bits.find('1', position + 1)
+
+    return positions
+
+
+class SimilarityIndex:
+    """Inverted index of one user's recipes by ingredient and tag.
+
+    Every recipe gets a bit position, and each feature's postings are an
+    integer bitset of the recipes having it, so combining postings costs
+    a few big-integer operations rather than a loop over recipes.
+    """
+
+    def __init__(self, sequence=0):
+        self.sequence = sequence
+        self.features = {}
+        self.positions = {}
+        self.recipe_ids = []
+        self.postings = defaultdict(int)
+
+    @classmethod
+    def build(cls, user, sequence=0):
+        """Return an index of all of a user's recipes."""
+        index = cls(sequence)
+        for recipe_id, features in _recipe_features(user).items():
+            index.add(recipe_id, features)
+
+        return index
+
+    def add(self, recipe_id, features):
+        """Index a recipe under each of its features."""
+        position = self.positions.get(recipe_id)
+        if position is None:
+            position = self.positions[recipe_id] = len(self.recipe_ids)
+            self.recipe_ids.append(recipe_id)
+        self.features[recipe_id] = frozenset(features)
+        bit = 1 << position
+        for feature in features:
+            self.postings[feature] |= bit
+
+    def remove(self, recipe_id):
+        """Drop a recipe from the index, if it is there.
+
+        Its bit position is kept, so re-adding the recipe reuses it.
+        """
+        features = self.features.pop(recipe_id, ())
+        if features:
+            bit = 1 << self.positions[recipe_id]
+            for feature in features:
+                self.postings[feature] &= ~bit
+                if not self.postings[feature]:
+                    del self.postings[feature]
+
+    def refresh(self, user, recipe_ids):
+        """Re-read the features of some recipes from the database."""
+        for recipe_id in recipe_ids:
+            self.remove(recipe_id)
+        for recipe_id, features in _recipe_features(
+                user, recipe_ids).items():
+            self.add(recipe_id, features)
+
+    def nbytes(self):
+        """Return the memory taken by the postings' bitsets."""
+        return sum(sys.getsizeof(recipes)
+                   for recipes in self.postings.values())
+
+    def similar(self, recipe_id, limit):
+        """Return up to limit (recipe id, Jaccard index) pairs, best first.
+
+        Ties are broken in favour of the newest recipe.
+        """
+        mine = self.features.get(recipe_id)
+        if not mine:
+            return []
+
+        # Count, for every recipe at once, how many of this recipe's
+        # features it shares: the count is kept bit-sliced, one bitset
+        # per binary digit, and each posting is added with a ripple carry.
+        size = len(mine)
+        digits = [0] * size.bit_length()
+        for feature in mine:
+            carry = self.postings[feature]
+            for i, digit in enumerate(digits):
+                digits[i], carry = digit ^ carry, digit & carry
+        everyone = (1 << len(self.recipe_ids)) - 1
+        digits = [digit & ~(1 << self.positions[recipe_id])
+                  for digit in digits]
+
+        # A recipe sharing n features scores at most n / size, so overlaps
+        # are visited from the largest down, stopping once they can no
+        # longer beat the current top scores.
+        best = []
+        for shared in range(size, 0, -1):
+            if len(best) == limit and shared / size < best[0][0]:
+                break
+            mask = everyone
+            for i, digit in enumerate(digits):
+                mask &= digit if shared >> i & 1 else ~digit
+            for position in _bit_positions(mask & everyone):
+                other = self.recipe_ids[position]
+                score = shared / (
+                    size + len(self.features[other]) - shared)
+                if len(best) < limit:
+                    heapq.heappush(best, (score, other))
+                elif (score, other) > best[0]:
+                    heapq.heapreplace(best, (score, other))
+
+        return [(other, score) for score, other in sorted(best, reverse=True)]
+
+    def cookable(self, ingredient_ids, max_missing, limit):
+        """Return up to limit recipes cookable from a pantry.
+
+        Each is a (recipe id, ingredient count, missing ingredient ids)
+        triple. Only recipes missing at most max_missing ingredients from the
+        pantry are returned, fewest missing first, then by the share of
+        their ingredients on hand and newest first.
+        """
+        pantry = {ingredient_id * 2 for ingredient_id in ingredient_ids}
+        # at_least[n] is the bitset of recipes missing more than n of
+        # their ingredients; each posting of an ingredient not on hand
+        # shifts the recipes having it up by one.
+        at_least = [0] * (max_missing + 1)
+        with_ingredients = 0
+        for feature, recipes in self.postings.items():
+            if feature & 1:
+                continue
+            with_ingredients |= recipes
+            if feature in pantry:
+                continue
+            for n in range(max_missing, 0, -1):
+                at_least[n] |= at_least[n - 1] & recipes
+            at_least[0] |= recipes
+
+        results = []
+        fewer = with_ingredients
+        for missing in range(max_missing + 1):
+            if len(results) >= limit:
+                break
+            level = fewer & ~at_least[missing]
+            fewer &= at_least[missing]
+            ranked = []
+            for position in _bit_positions(level):
+                recipe_id = self.recipe_ids[position]
+                ingredients = [feature for feature in self.features[recipe_id]
+                               if not feature & 1]
+                ranked.append((len(ingredients), recipe_id, ingredients))
+            for _, recipe_id, ingredients in heapq.nlargest(
+                    limit - len(results), ranked):
+                results.append((recipe_id, len(ingredients), sorted(
+                    feature // 2 for feature in ingredients
+                    if feature not in pantry)))
+
+        return results
+
+
+class _Entry:
+    """A user's cached index and the lock serializing its use."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.nbytes = 0
+
+
+class SimilarityIndexes:
+    """LRU of per-user similarity indexes kept current from the log.
+
+    The LRU is bounded both by users and by the total size of the
+    postings. Its own lock is only held to look up and account for
+    entries; building, patching and querying a user's index hold that
+    user's lock alone, so a slow build never holds up other users.
+    """
+
+    def __init__(self, max_users, max_bytes):
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.builds = 0
+        self.patches = 0
+
+    def _pending_changes(self, user, index, sequence):
+        """Return the recipe ids changed since an index, or None."""
+        if sequence < index.sequence:
+            return None
+        if sequence == index.sequence:
+            return set()
+
+        keys = [_change_key(user.pk, number)
+                for number in range(index.sequence + 1, sequence + 1)]
+        if len(keys) > MAX_PATCH_RECIPES:
+            return None
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return None
+
+        recipe_ids = set().union(*changes.values())
+        return recipe_ids if len(recipe_ids) <= MAX_PATCH_RECIPES else None
+
+    def _entry(self, user_id):
+        """Return the user's LRU entry, adding an empty one if needed."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = _Entry()
+            self._entries.move_to_end(user_id)
+
+            return entry
+
+    def _store(self, user_id, entry, index, built):
+        """Account for a built or patched index and evict to fit."""
+        nbytes = index.nbytes()
+        with self._lock:
+            if built:
+                self.builds += 1
+            else:
+                self.patches += 1
+            entry.index = index
+            if self._entries.get(user_id) is not entry:
+                return
+            self._nbytes += nbytes - entry.nbytes
+            entry.nbytes = nbytes
+            # The entry in use is the most recent, so it only goes when
+            # it alone exceeds the budget; its index still answers this
+            # request.
+            while self._entries and (
+                    len(self._entries) > self.max_users
+                    or self._nbytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    @contextmanager
+    def _current(self, user):
+        """Hold the user's index, with all logged changes applied."""
+        entry = self._entry(user.pk)
+        with entry.lock:
+            sequence = cache.get(_sequence_key(user.pk), 0)
+            index = entry.index
+            if index is not None:
+                changed = self._pending_changes(user, index, sequence)
+                if changed is None:
+                    index = None
+                elif changed:
+                    index.refresh(user, changed)
+                    index.sequence = sequence
+                    self._store(user.pk, entry, index, built=False)
+            if index is None:
+                index = SimilarityIndex.build(user, sequence)
+                self._store(user.pk, entry, index, built=True)
+
+            yield index
+
+    def similar(self, user, recipe_id, limit):
+        """Return the user's recipes most similar to one of theirs."""
+        with self._current(user) as index:
+            return index.similar(recipe_id, limit)
+
+    def cookable(self, user, ingredient_ids, max_missing, limit):
+        """Return the user's recipes cookable from a set of ingredients."""
+        with self._current(user) as index:
+            return index.cookable(ingredient_ids, max_missing, limit)
+
+    def stats(self):
+        """Return the cached indexes and their size, builds and patches."""
+        return {
+            'users': len(self._entries),
+            'bytes': self._nbytes,
+            'builds': self.builds,
+            'patches': self.patches,
+        }
+
+
+similarity_indexes = SimilarityIndexes(
+    settings.SIMILARITY_INDEX_USERS, settings.SIMILARITY_INDEX_MAX_BYTES)
@@ -0,0 +1,108 @@
+"""
+Aggregate statistics over a user's recipe library.
+
+Everything is computed in PostgreSQL: ordered-set aggregates for the
+percentiles and ``width_bucket`` for the histograms, so only a few rows
+of results ever leave the database however large the library is.
+"""
+from django.db.models import (Aggregate, Avg, Count, F, FloatField, Func,
+                              IntegerField, Max, Min, Sum)
+from django.db.models.functions import Least
+from django.contrib.postgres.fields import ArrayField
+
+from core.models import Recipe
+
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+DEFAULT_BUCKETS = 10
+MAX_BUCKETS = 50
+COLUMNS = ('price', 'time_minutes')
+
+
+class PercentileCont(Aggregate):
+    """Continuous percentiles of an expression, as an array of floats."""
+    function = 'PERCENTILE_CONT'
+    template = ('%(function)s(%(percentiles)s) '
+                'WITHIN GROUP (ORDER BY %(expressions)s)')
+    output_field = ArrayField(FloatField())
+
+    def __init__(self, expression, percentiles, **extra):
+        percentiles = ', '.join(str(float(p)) for p in percentiles)
+        super().__init__(
+            expression, percentiles=f'ARRAY[{percentiles}]', **extra)
+
+
+class WidthBucket(Func):
+    """Return which of ``buckets`` equal-width buckets a value falls in."""
+    function = 'WIDTH_BUCKET'
+    output_field = IntegerField()
+
+
+def _histogram(recipes, column, low, high, buckets):
+    """Return the equal-width histogram of a column between two bounds."""
+    if low == high:
+        return [{'min': low, 'max': high, 'count': recipes.count()}]
+
+    # width_bucket puts the upper bound itself in bucket n + 1.
+    counts = dict(recipes.annotate(bucket=Least(
+        WidthBucket(column, float(low), float(high), buckets), buckets,
+    )).values('bucket').annotate(count=Count('id')).values_list(
+        'bucket', 'count'))
+    width = (high - low) / buckets
+
+    return [{
+        'min': round(low + i * width, 2),
+        'max': round(low + (i + 1) * width, 2),
+        'count': counts.get(i + 1, 0),
+    } for i in range(buckets)]
+
+
+def _rounded(value):
+    """Return a numeric aggregate as a float rounded to cents."""
+    return None if value is None else round(float(value), 2)
+
+
+def recipe_stats(user, buckets=DEFAULT_BUCKETS):
+    """Return totals, percentiles, histograms and per-tag prices."""
+    recipes = Recipe.objects.filter(user=user)
+    aggregates = {'recipes': Count('id')}
+    for column in COLUMNS:
+        aggregates.update({
+            f'{column}_min': Min(column),
+            f'{column}_max': Max(column),
+            f'{column}_mean': Avg(column),
+            f'{column}_total': Sum(column),
+            f'{column}_percentiles': PercentileCont(column, PERCENTILES),
+        })
+    summary = recipes.aggregate(**aggregates)
+
+    stats = {'recipes': summary['recipes']}
+    for column in COLUMNS:
+        low = _rounded(summary[f'{column}_min'])
+        high = _rounded(summary[f'{column}_max'])
+        percentiles = summary[f'{column}_percentiles'] or []
+        stats[column] = {
+            'min': low,
+            'max': high,
+            'mean': _rounded(summary[f'{column}_mean']),
+            'total': _rounded(summary[f'{column}_total']),
+            'percentiles': {
+                f'p{round(p * 100)}': _rounded(value)
+                for p, value in zip(PERCENTILES, percentiles)
+            },
+            'histogram': (_histogram(recipes, column, low, high, buckets)
+                          if summary['recipes'] else []),
+        }
+
+    tags = Recipe.tags.through.objects.filter(recipe__user=user).values(
+        'tag_id', name=F('tag__name'),
+    ).annotate(
+        recipes=Count('*'), average_price=Avg('recipe__price'),
+    ).order_by('-recipes', 'name')
+    stats['tags'] = [{
+        'id': tag['tag_id'],
+        'name': tag['name'],
+        'recipes': tag['recipes'],
+        'average_price': _rounded(tag['average_price']),
+    } for tag in tags]
+
+    return stats
@@ -0,0 +1,123 @@
+"""
+Test cases for the async read-only recipe views.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from user.authentication import issue_tokens
+
+
+class AsyncReadViewTests(TestCase):
+    """Test the async views answer like the synchronous ones."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'async@example.com', 'testpass123')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Leek')
+        for title in ('Soup', 'Stew'):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=10,
+                price=Decimal('2.50'))
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+        self.recipe = recipe
+
+    def assertSameResponse(self, name, args=(), params=None):
+        """Assert the async and sync views return the same data."""
+        expected = self.client.get(reverse(f'recipe:{name}', args=args),
+                                   params)
+        response = self.client.get(
+            reverse(f'recipe:async-{name}', args=args), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), expected.json())
+
+    def test_recipes(self):
+        """Test recipe list and detail match, including parameters."""
+        self.assertSameResponse('recipe-list')
+        self.assertSameResponse(
+            'recipe-list', params={'tags': self.tag.id, 'fields': 'title'})
+        self.assertSameResponse('recipe-detail', args=[self.recipe.id])
+
+    def test_tags_and_ingredients(self):
+        """Test tag and ingredient lists match."""
+        self.assertSameResponse('tag-list', params={'with_counts': 1})
+        self.assertSameResponse(
+            'ingredient-list', params={'assigned_only': 1})
+
+        response = self.client.get(reverse(
+            'recipe:async-tag-detail', args=[self.tag.id]))
+
+        self.assertEqual(response.json(),
+                         {'id': self.tag.id, 'name': 'Dinner'})
+
+    def test_signed_token(self):
+        """Test signed access tokens authenticate without a query."""
+        access = issue_tokens(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('recipe:async-tag-list'))
+
+        self.assertEqual(len(response.json()), 1)
+
+    def test_errors(self):
+        """Test authentication, missing objects and bad parameters."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        theirs = Recipe.objects.create(
+            user=other, title='Bread', time_minutes=10,
+            price=Decimal('1.00'))
+        detail = reverse('recipe:async-recipe-detail', args=[theirs.id])
+
+        missing = self.client.get(detail)
+        invalid = self.client.get(
+            reverse('recipe:async-recipe-list'), {'fields': 'secret'})
+        self.client.credentials()
+        anonymous = self.client.get(detail)
+
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(anonymous.status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Bearer')
+
+
+class AsyncExportTests(TestCase):
+    """Test the recipe export streams under ASGI."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'export@example.com', 'testpass123')
+        for title in ('Soup', 'Stew'):
+            Recipe.objects.create(user=self.user, title=title,
+                                  time_minutes=10, price=Decimal('2.50'))
+        self.access = issue_tokens(self.user)['access']
+        self.client = AsyncClient()
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=1)
+    async def test_export_streams_chunks(self):
+        """Test the export is sent chunk by chunk, not buffered."""
+        response = await self.client.get(
+            reverse('recipe:recipe-export'),
+            headers={'Authorization': f'Bearer {self.access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        parts = [json.loads(part) async for part in response]
+        self.assertEqual([part['title'] for part in parts],
+                         ['Soup', 'Stew'])
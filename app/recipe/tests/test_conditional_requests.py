@@ -0,0 +1,189 @@
+"""
+Test cases for ETag based conditional requests.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import bump_data_version
+from recipe.views import RecipeViewSet
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+        'description': 'Sample description',
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag, If-None-Match and If-Match handling."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'etag@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match on a list returns 304."""
+        create_recipe(self.user)
+        res = self.client.get(RECIPE_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match on a detail returns 304."""
+        recipe = create_recipe(self.user)
+        res = self.client.get(detail_url(recipe.id))
+
+        res = self.client.get(detail_url(recipe.id),
+                              HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_during_read_leaves_etag_stale(self):
+        """Test a read is tagged with the version from before its query."""
+        recipe = create_recipe(self.user, title='Old')
+        original_retrieve = RecipeViewSet.retrieve
+
+        def retrieve_then_write(view, request, *args, **kwargs):
+            response = original_retrieve(view, request, *args, **kwargs)
+            Recipe.objects.filter(id=recipe.id).update(title='New')
+            bump_data_version(self.user)
+            return response
+
+        with patch.object(RecipeViewSet, 'retrieve', retrieve_then_write):
+            stale = self.client.get(detail_url(recipe.id))
+        res = self.client.get(detail_url(recipe.id),
+                              HTTP_IF_NONE_MATCH=stale['ETag'])
+
+        self.assertEqual(stale.data['title'], 'Old')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New')
+
+    def test_etag_changes_after_write(self):
+        """Test a write makes previously issued ETags stale."""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.patch(detail_url(recipe.id), {'title': 'Changed'})
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_differs_per_query(self):
+        """Test different query strings get different ETags."""
+        first = self.client.get(RECIPE_URL)
+        second = self.client.get(RECIPE_URL, {'tags': '1'})
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_tag_list_not_modified(self):
+        """Test conditional GETs on the tag list."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAG_URL)['ETag']
+
+        res = self.client.get(TAG_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_with_current_if_match(self):
+        """Test a write with a current If-Match succeeds."""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        res = self.client.patch(detail_url(recipe.id), {'title': 'New'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_update_with_stale_if_match(self):
+        """Test a write with a stale If-Match is refused."""
+        recipe = create_recipe(self.user, title='Original')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+        self.client.patch(detail_url(recipe.id), {'title': 'Newer'})
+
+        res = self.client.patch(detail_url(recipe.id), {'title': 'Stale'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Newer')
+
+    def test_delete_with_stale_if_match(self):
+        """Test a delete with a stale If-Match is refused."""
+        recipe = create_recipe(self.user)
+
+        res = self.client.delete(detail_url(recipe.id),
+                                 HTTP_IF_MATCH='"0-0-0"')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_missing_detail_if_none_match_any(self):
+        """Test If-None-Match: * on a missing object returns 404."""
+        res = self.client.get(detail_url(0), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_with_other_resource_if_match(self):
+        """Test an If-Match from a different resource is refused."""
+        recipe = create_recipe(self.user, title='Original')
+        other = create_recipe(self.user)
+        etag = self.client.get(detail_url(other.id))['ETag']
+
+        res = self.client.patch(detail_url(recipe.id), {'title': 'New'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Original')
+
+    def test_collection_write_with_list_if_match(self):
+        """Test a batch write is checked against the list's ETag."""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+        url = reverse('recipe:recipe-bulk')
+
+        res = self.client.patch(
+            url, {'ids': [recipe.id], 'data': {'title': 'New'}},
+            format='json', HTTP_IF_MATCH=etag)
+        stale = self.client.patch(
+            url, {'ids': [recipe.id], 'data': {'title': 'Newer'}},
+            format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(stale.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
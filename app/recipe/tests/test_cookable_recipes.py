@@ -0,0 +1,125 @@
+"""
+Test cases for finding recipes cookable from a pantry.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.similarity import SimilarityIndex
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+class CookableIndexTests(SimpleTestCase):
+    """Test pantry matching on the in-memory index."""
+
+    def test_matches_full_scan(self):
+        """Test the index ranks recipes like checking each one does."""
+        rng = random.Random(0)
+        index = SimilarityIndex()
+        library = {}
+        for recipe_id in range(1, 400):
+            ingredients = set(rng.sample(range(30), rng.randint(1, 8)))
+            library[recipe_id] = ingredients
+            # Tags use odd feature ids and must not count as ingredients.
+            index.add(recipe_id, {i * 2 for i in ingredients} | {1, 3})
+        pantry = set(rng.sample(range(30), 15))
+
+        for max_missing in range(4):
+            expected = sorted(
+                (len(ingredients - pantry), -len(ingredients), -recipe_id)
+                for recipe_id, ingredients in library.items()
+                if len(ingredients - pantry) <= max_missing)[:20]
+
+            result = index.cookable(pantry, max_missing, 20)
+
+            self.assertEqual(
+                [(recipe_id, len(missing)) for recipe_id, _, missing
+                 in result],
+                [(-recipe_id, missing) for missing, _, recipe_id
+                 in expected])
+            for recipe_id, count, missing in result:
+                self.assertEqual(count, len(library[recipe_id]))
+                self.assertEqual(
+                    missing, sorted(library[recipe_id] - pantry))
+
+
+class CookableRecipesApiTests(TestCase):
+    """Test the cookable recipes endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'pantry@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        self.leek, self.potato, self.salt, self.sugar = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Leek', 'Potato', 'Salt', 'Sugar')]
+
+    def create_recipe(self, title, ingredients, user=None):
+        """Create a recipe linked to the given ingredients."""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title=title, time_minutes=10,
+            price=Decimal('2.00'))
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def test_cookable_recipes(self):
+        """Test recipes are ranked by the ingredients they still need."""
+        soup = self.create_recipe('Soup', [self.leek, self.potato])
+        chips = self.create_recipe('Chips', [self.potato, self.salt])
+        mash = self.create_recipe(
+            'Mash', [self.potato, self.salt, self.leek])
+        cake = self.create_recipe('Cake', [self.sugar, self.salt])
+        Recipe.objects.create(
+            user=self.user, title='Water', time_minutes=1,
+            price=Decimal('0.00')).tags.add(
+                Tag.objects.create(user=self.user, name='Drink'))
+
+        response = self.client.post(COOKABLE_URL, {
+            'ingredients': [self.leek.id, self.potato.id],
+            'max_missing': 1,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['id'], r['missing'], r['coverage']) for r in response.data],
+            [(soup.id, [], 1.0),
+             (mash.id, [self.salt.id], 0.6667),
+             (chips.id, [self.salt.id], 0.5)])
+        self.assertNotIn(cake.id, [r['id'] for r in response.data])
+        self.assertEqual(response.data[0]['title'], 'Soup')
+
+    def test_cookable_only_own_recipes(self):
+        """Test other users' recipes and ingredients are ignored."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        flour = Ingredient.objects.create(user=other, name='Flour')
+        self.create_recipe('Bread', [flour], user=other)
+
+        response = self.client.post(
+            COOKABLE_URL, {'ingredients': [flour.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_cookable_limits(self):
+        """Test the limit applies and max_missing is bounded."""
+        for i in range(3):
+            self.create_recipe(f'Leek {i}', [self.leek])
+
+        response = self.client.post(COOKABLE_URL, {
+            'ingredients': [self.leek.id], 'limit': 2,
+        }, format='json')
+        invalid = self.client.post(COOKABLE_URL, {
+            'ingredients': [self.leek.id], 'max_missing': 100,
+        }, format='json')
+
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
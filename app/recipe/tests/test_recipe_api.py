@@ -2,11 +2,17 @@
 Test cases for the recipe module.
 """
 from decimal import Decimal
+import csv
+import gzip
+import io
+import json
 import tempfile
 import os
 from PIL import Image
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 
 from django.urls import reverse
 from rest_framework import status
@@ -17,6 +23,7 @@ from recipe.serializers import (RecipeSerializer,
 
 
 RECIPE_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def detail_url(recipe_id):
@@ -297,6 +304,30 @@ class PrivateRecipeApiTests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_query_count_constant(self):
+        """Test nested tags and ingredients are written in batches."""
+        for total in (1, 30):
+            payload = {
+                'title': f'Recipe {total}',
+                'time_minutes': 30,
+                'price': Decimal('2.50'),
+                'description': 'Sample description',
+                'tags': [{'name': f'Tag {total}'}],
+                'ingredients': [{'name': f'Ingredient {i}'}
+                                for i in range(total)],
+            }
+
+            # The recipe, then per relation: look names up, insert the
+            # missing ones, read their ids back and link them. Two more
+            # load the nested items for the response.
+            with self.assertNumQueries(11):
+                response = self.client.post(RECIPE_URL, payload,
+                                            format='json')
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            recipe = Recipe.objects.get(id=response.data['id'])
+            self.assertEqual(recipe.ingredients.count(), total)
+
     def test_create_recipe_with_existing_ingredients(self):
         """Test creating recipe with existing ingredients."""
         ingredient = Ingredient.objects.create(user=self.user, name='Cabbage')
@@ -362,6 +393,41 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.ingredients.count(), 0)
         self.assertNotIn(ingredient, recipe.ingredients.all())
 
+    def test_update_unchanged_relations_writes_nothing(self):
+        """Test re-sending the same tags leaves the join table alone."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+        payload = {'tags': [{'name': 'Lunch'}]}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(detail_url(recipe.id), payload,
+                                         format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [q['sql'] for q in queries
+                  if 'core_recipe_tags' in q['sql']
+                  and q['sql'].startswith(('INSERT', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_update_relations_writes_only_changes(self):
+        """Test changing one ingredient only touches that link."""
+        recipe = create_recipe(user=self.user)
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        leek = Ingredient.objects.create(user=self.user, name='Leek')
+        recipe.ingredients.add(salt, leek)
+        links = Recipe.ingredients.through.objects.filter(recipe=recipe)
+        salt_link = links.get(ingredient=salt).id
+        payload = {'ingredients': [{'name': 'Salt'}, {'name': 'Kale'}]}
+
+        response = self.client.patch(detail_url(recipe.id), payload,
+                                     format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(links.get(ingredient=salt).id, salt_link)
+        self.assertEqual(
+            sorted(links.values_list('ingredient__name', flat=True)),
+            ['Kale', 'Salt'])
+
     def test_filter_by_tags(self):
         """Test filtering recipes by tags"""
         r1 = create_recipe(user=self.user, title='Thai Vegetable Curry')
@@ -413,6 +479,278 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(s2.data, response.data)
         self.assertNotIn(s3.data, response.data)
 
+    def test_filter_by_tags_returns_unique(self):
+        """Test a recipe matching several filter tags is listed once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag1, tag2)
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        response = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in response.data], [recipe.id])
+
+    def test_filter_match_all(self):
+        """Test filtering recipes having all requested tags/ingredients."""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+        ingredient = Ingredient.objects.create(user=self.user, name='Tofu')
+        r1 = create_recipe(user=self.user, title='Tofu Stir Fry')
+        r1.tags.add(tag1, tag2)
+        r1.ingredients.add(ingredient)
+        r2 = create_recipe(user=self.user, title='Vegan Stew')
+        r2.tags.add(tag1)
+        r2.ingredients.add(ingredient)
+        r3 = create_recipe(user=self.user, title='Quick Salad')
+        r3.tags.add(tag1, tag2)
+
+        params = {
+            'tags': f'{tag1.id},{tag2.id}',
+            'ingredients': f'{ingredient.id}',
+            'match': 'all',
+        }
+        response = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in response.data], [r1.id])
+
+    def test_search_recipes(self):
+        """Test full-text search over title and description."""
+        r1 = create_recipe(user=self.user, title='Spicy Chicken Curry',
+                           description='A warming dinner.')
+        r2 = create_recipe(user=self.user, title='Fruit Salad',
+                           description='Goes well after a curry.')
+        create_recipe(user=self.user, title='Pancakes',
+                      description='Sweet breakfast.')
+
+        response = self.client.get(RECIPE_URL, {'search': 'curries'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data], [r1.id, r2.id])
+
+    def test_search_paginated(self):
+        """Test paging through ranked search results."""
+        title_match = create_recipe(user=self.user, title='Lemon Tart',
+                                    description='Dessert.')
+        description_matches = [
+            create_recipe(user=self.user, title=f'Cake {i}',
+                          description='Zest of one lemon.')
+            for i in range(3)
+        ]
+
+        seen_ids = []
+        response = self.client.get(
+            RECIPE_URL, {'search': 'lemon', 'page_size': 2})
+        while True:
+            seen_ids.extend(r['id'] for r in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen_ids[0], title_match.id)
+        self.assertCountEqual(
+            seen_ids[1:], [r.id for r in description_matches])
+
+    def _create_recipes_with_relations(self, count):
+        """Create recipes that each have a tag and an ingredient."""
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(Tag.objects.create(
+                user=self.user, name=f'Tag {count}.{i}'))
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=self.user, name=f'Ing {count}.{i}'))
+
+    def test_list_query_count_constant(self):
+        """Test listing recipes uses a fixed number of queries."""
+        for total in (1, 5, 25):
+            Recipe.objects.filter(user=self.user).delete()
+            self._create_recipes_with_relations(total)
+
+            with self.assertNumQueries(3):
+                response = self.client.get(RECIPE_URL)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), total)
+
+    def test_detail_query_count_constant(self):
+        """Test retrieving a recipe uses a fixed number of queries."""
+        self._create_recipes_with_relations(1)
+        recipe = Recipe.objects.get(user=self.user)
+        for i in range(10):
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Extra {i}'))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tags']), 11)
+
+    def test_list_unpaginated_by_default(self):
+        """Test recipes are returned as a plain list without opting in."""
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+    def test_list_cursor_pagination(self):
+        """Test walking recipe pages with an opaque cursor."""
+        recipes = [create_recipe(user=self.user, title=f'Recipe {i}')
+                   for i in range(5)]
+        expected_ids = [r.id for r in reversed(recipes)]
+
+        seen_ids = []
+        response = self.client.get(RECIPE_URL, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen_ids.extend(r['id'] for r in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen_ids, expected_ids)
+
+    def test_deep_page_query_count_constant(self):
+        """Test a deep page costs the same number of queries as the first."""
+        for i in range(6):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        with self.assertNumQueries(3):
+            response = self.client.get(RECIPE_URL, {'page_size': 2})
+        next_url = response.data['next']
+        response = self.client.get(next_url)
+        next_url = response.data['next']
+
+        with self.assertNumQueries(3):
+            response = self.client.get(next_url)
+
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor returns 404."""
+        response = self.client.get(RECIPE_URL, {'cursor': 'bogus'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_sparse_fields(self):
+        """Test ?fields= returns and loads only the requested columns."""
+        self._create_recipes_with_relations(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        for recipe in response.data:
+            self.assertEqual(set(recipe), {'id', 'title'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_list_sparse_fields_expand(self):
+        """Test ?expand= adds nested relations to the requested fields."""
+        self._create_recipes_with_relations(2)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                RECIPE_URL, {'fields': 'title', 'expand': 'tags'})
+
+        for recipe in response.data:
+            self.assertEqual(set(recipe), {'title', 'tags'})
+            self.assertEqual(len(recipe['tags']), 1)
+
+    def test_detail_sparse_fields(self):
+        """Test ?fields= applies to a single recipe."""
+        recipe = create_recipe(user=self.user)
+
+        response = self.client.get(
+            detail_url(recipe.id), {'fields': 'title,image'})
+
+        self.assertEqual(response.data,
+                         {'title': recipe.title, 'image': None})
+
+    def test_sparse_fields_unknown(self):
+        """Test unknown field names are rejected."""
+        response = self.client.get(
+            RECIPE_URL, {'fields': 'title,secret', 'expand': 'user'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        self.assertIn('expand', response.data)
+
+    def test_detail_fields_listed_once(self):
+        """Test the detail serializer lists each field once."""
+        fields = RecipeDetailSerializer.Meta.fields
+
+        self.assertEqual(len(fields), len(set(fields)))
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline-delimited JSON."""
+        recipe = create_recipe(user=self.user, title='Soup')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        create_recipe(user=create_user(email='other@example.com',
+                                       password='testpass123'))
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['title'], 'Soup')
+        self.assertEqual(row['price'], '5.99')
+        self.assertEqual(row['tags'], [{'name': 'Vegan'}])
+        self.assertEqual(row['ingredients'], [])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        recipe = create_recipe(user=self.user, title='Soup')
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Salt'),
+            Ingredient.objects.create(user=self.user, name='Leek'))
+
+        response = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Soup')
+        self.assertEqual(rows[0]['ingredients'], 'Leek;Salt')
+
+    def test_export_gzip(self):
+        """Test exports are compressed when the client accepts gzip."""
+        create_recipe(user=self.user, title='Soup')
+
+        response = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(json.loads(content)['title'], 'Soup')
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        """Test related names are fetched once per chunk of recipes."""
+        self._create_recipes_with_relations(5)
+
+        # One cursor declaration plus two lookups for each of 3 chunks.
+        with self.assertNumQueries(7):
+            response = self.client.get(EXPORT_URL)
+            lines = b''.join(response.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 5)
+
+    def test_export_invalid_output(self):
+        """Test an unknown export format is rejected."""
+        response = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ImageUploadTests(TestCase):
     """Test image upload functionality."""
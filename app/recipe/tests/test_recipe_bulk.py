@@ -0,0 +1,295 @@
+"""
+Test cases for the bulk recipe endpoints.
+"""
+import gzip
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.bulk import resolve_names
+
+BULK_URL = reverse('recipe:recipe-bulk')
+BULK_TAGS_URL = reverse('recipe:recipe-bulk-tags')
+
+
+def recipe_payload(**params):
+    """Return a sample recipe payload."""
+    payload = {
+        'title': 'Sample recipe',
+        'time_minutes': 20,
+        'price': '5.99',
+        'description': 'Sample description',
+    }
+    payload.update(params)
+    return payload
+
+
+class BulkImportTests(TestCase):
+    """Test importing many recipes in one request."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes and resolving shared names once."""
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [
+            recipe_payload(title='Soup', tags=[{'name': 'Vegan'}],
+                           ingredients=[{'name': 'Leek'}]),
+            recipe_payload(title='Stew', tags=[{'name': 'Vegan'},
+                                               {'name': 'Winter'}],
+                           ingredients=[{'name': 'Leek'}, {'name': 'Leek'}]),
+        ]
+
+        response = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in response.data['results']]
+        soup, stew = (Recipe.objects.get(id=id) for id in ids)
+        self.assertEqual(soup.title, 'Soup')
+        self.assertEqual(list(soup.tags.all()), [existing])
+        self.assertEqual(stew.tags.count(), 2)
+        self.assertEqual(stew.ingredients.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported without failing the batch."""
+        payload = [recipe_payload(title='Soup'), {'title': 'No time'}, 'x']
+
+        response = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data['results']
+        self.assertEqual(results[0]['status'], status.HTTP_201_CREATED)
+        self.assertIn('time_minutes', results[1]['errors'])
+        self.assertIn('non_field_errors', results[2]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_all_invalid(self):
+        """Test a batch with no valid items returns 400."""
+        response = self.client.post(BULK_URL, [{}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_requires_list(self):
+        """Test the body must be a list of recipes."""
+        response = self.client.post(BULK_URL, recipe_payload(),
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BULK_MAX_ITEMS=2)
+    def test_bulk_create_item_limit(self):
+        """Test batches over the item limit are rejected."""
+        response = self.client.post(
+            BULK_URL, [recipe_payload()] * 3, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_gzip_ndjson(self):
+        """Test importing gzip compressed NDJSON."""
+        lines = [json.dumps(recipe_payload(title=f'Recipe {i}'))
+                 for i in range(3)]
+        body = gzip.compress('\n'.join(lines).encode())
+
+        response = self.client.post(
+            BULK_URL, body, content_type='application/x-ndjson',
+            HTTP_CONTENT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+
+    @override_settings(RECIPE_BULK_MAX_BYTES=1000)
+    def test_bulk_create_gzip_bomb(self):
+        """Test a body decompressing past the byte limit is refused."""
+        body = gzip.compress(b'\n' * 10_000_000)
+
+        response = self.client.post(
+            BULK_URL, body, content_type='application/x-ndjson',
+            HTTP_CONTENT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(RECIPE_BULK_MAX_BYTES=1000)
+    def test_bulk_create_long_line(self):
+        """Test a line longer than the byte limit is refused."""
+        body = json.dumps(recipe_payload(description='x' * 5000)).encode()
+
+        response = self.client.post(
+            BULK_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_invalid_ndjson(self):
+        """Test a malformed NDJSON line is rejected."""
+        response = self.client.post(
+            BULK_URL, b'{"title": "Soup"}\n{oops\n',
+            content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_query_count_constant(self):
+        """Test the number of queries does not grow with the batch."""
+        for total in (1, 20):
+            payload = [recipe_payload(
+                title=f'Recipe {i}',
+                tags=[{'name': f'Tag {i}'}, {'name': 'Shared'}],
+                ingredients=[{'name': f'Ingredient {i}'}],
+            ) for i in range(total)]
+
+            # Savepoint and release, the recipes, then three queries to
+            # resolve names and one insert per link table.
+            with self.assertNumQueries(11):
+                response = self.client.post(BULK_URL, payload,
+                                            format='json')
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_resolve_names(self):
+        """Test resolving names reuses existing rows and creates others."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        ids = resolve_names(Ingredient, self.user, ['Salt', 'Leek', 'Leek'])
+
+        self.assertEqual(ids['Salt'], salt.id)
+        self.assertEqual(
+            Ingredient.objects.get(user=self.user, name='Leek').id,
+            ids['Leek'])
+
+
+class BulkChangeTests(TestCase):
+    """Test updating, deleting and retagging batches of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            Recipe.objects.create(user=self.user, title=f'Recipe {i}',
+                                  time_minutes=10, price=Decimal('1.00'))
+            for i in range(3)
+        ]
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        self.other_recipe = Recipe.objects.create(
+            user=other, title='Other', time_minutes=10,
+            price=Decimal('1.00'))
+
+    def test_bulk_update(self):
+        """Test updating a batch of recipes reports each id."""
+        ids = [self.recipes[0].id, self.other_recipe.id]
+        payload = {'ids': ids, 'data': {'time_minutes': 45}}
+
+        response = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, [status.HTTP_200_OK,
+                                    status.HTTP_404_NOT_FOUND])
+        self.recipes[0].refresh_from_db()
+        self.other_recipe.refresh_from_db()
+        self.assertEqual(self.recipes[0].time_minutes, 45)
+        self.assertEqual(self.other_recipe.time_minutes, 10)
+
+    def test_bulk_update_invalid_data(self):
+        """Test invalid or unsupported fields are rejected."""
+        for data in ({'time_minutes': 'soon'}, {'tags': []}, {}):
+            payload = {'ids': [self.recipes[0].id], 'data': data}
+
+            response = self.client.patch(BULK_URL, payload, format='json')
+
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+            self.assertIn('data', response.data)
+
+    def test_bulk_update_query_count_constant(self):
+        """Test a batch update runs a fixed number of queries."""
+        ids = [recipe.id for recipe in self.recipes]
+        payload = {'ids': ids, 'data': {'title': 'Renamed'}}
+
+        # Savepoint, lock the owned rows, update them, release.
+        with self.assertNumQueries(4):
+            self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(
+            Recipe.objects.filter(title='Renamed').count(), 3)
+
+    def test_bulk_delete(self):
+        """Test deleting a batch only removes the user's recipes."""
+        ids = [self.recipes[0].id, self.recipes[1].id, self.other_recipe.id]
+
+        response = self.client.delete(BULK_URL, {'ids': ids},
+                                      format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, [status.HTTP_204_NO_CONTENT,
+                                    status.HTTP_204_NO_CONTENT,
+                                    status.HTTP_404_NOT_FOUND])
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user)), [self.recipes[2]])
+        self.assertTrue(
+            Recipe.objects.filter(id=self.other_recipe.id).exists())
+
+    def test_bulk_delete_requires_ids(self):
+        """Test an empty batch is rejected."""
+        response = self.client.delete(BULK_URL, {'ids': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_tags(self):
+        """Test adding and removing tags on a batch of recipes."""
+        old = Tag.objects.create(user=self.user, name='Summer')
+        for recipe in self.recipes:
+            recipe.tags.add(old)
+        self.recipes[0].tags.add(
+            Tag.objects.create(user=self.user, name='Winter'))
+        ids = [recipe.id for recipe in self.recipes[:2]]
+        payload = {'ids': ids, 'add': [{'name': 'Winter'}],
+                   'remove': [{'name': 'Summer'}]}
+
+        response = self.client.post(BULK_TAGS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for recipe in self.recipes[:2]:
+            self.assertEqual(
+                list(recipe.tags.values_list('name', flat=True)),
+                ['Winter'])
+        self.assertEqual(list(self.recipes[2].tags.all()), [old])
+
+    def test_bulk_tags_other_users_recipe(self):
+        """Test tags cannot be added to another user's recipe."""
+        payload = {'ids': [self.other_recipe.id], 'add': [{'name': 'Mine'}]}
+
+        response = self.client.post(BULK_TAGS_URL, payload, format='json')
+
+        self.assertEqual(response.data['results'][0]['status'],
+                         status.HTTP_404_NOT_FOUND)
+        self.assertFalse(self.other_recipe.tags.exists())
+        self.assertFalse(Tag.objects.filter(name='Mine').exists())
+
+    def test_bulk_tags_requires_change(self):
+        """Test a tag batch must add or remove something."""
+        payload = {'ids': [self.recipes[0].id]}
+
+        response = self.client.post(BULK_TAGS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,178 @@
+"""
+Test cases for the recipe list response cache.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.mixins import ListModelMixin
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import bump_data_version, recipe_list_cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+        'description': 'Sample description',
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeListCacheTests(TestCase):
+    """Test caching of recipe list responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'cache@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeat_read_skips_database(self):
+        """Test a repeated list request is served without queries."""
+        create_recipe(self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_filters_cached_separately(self):
+        """Test different filter parameters get separate entries."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(self.user, title='Tagged')
+        recipe.tags.add(tag)
+        create_recipe(self.user, title='Untagged')
+
+        all_res = self.client.get(RECIPE_URL)
+        tagged_res = self.client.get(RECIPE_URL, {'tags': str(tag.id)})
+
+        self.assertEqual(len(all_res.data), 2)
+        self.assertEqual(len(tagged_res.data), 1)
+
+    def test_create_invalidates(self):
+        """Test creating a recipe invalidates cached lists."""
+        self.client.get(RECIPE_URL)
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '1.00',
+                   'description': 'New recipe'}
+        self.client.post(RECIPE_URL, payload)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_update_and_delete_invalidate(self):
+        """Test updating and deleting a recipe invalidate cached lists."""
+        recipe = create_recipe(self.user, title='Before')
+        self.client.get(RECIPE_URL)
+
+        self.client.patch(detail_url(recipe.id), {'title': 'After'})
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data[0]['title'], 'After')
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data, [])
+
+    def test_write_during_read_not_cached_as_current(self):
+        """Test a list read before a write is not cached after it."""
+        create_recipe(self.user, title='First')
+        original_list = ListModelMixin.list
+
+        def list_then_write(view, request, *args, **kwargs):
+            response = original_list(view, request, *args, **kwargs)
+            create_recipe(self.user, title='Concurrent')
+            bump_data_version(self.user)
+            return response
+
+        with patch.object(ListModelMixin, 'list', list_then_write):
+            stale = self.client.get(RECIPE_URL)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(stale.data), 1)
+        self.assertEqual(len(res.data), 2)
+
+    def test_tag_edit_invalidates(self):
+        """Test renaming a tag invalidates cached recipe lists."""
+        tag = Tag.objects.create(user=self.user, name='Old')
+        create_recipe(self.user).tags.add(tag)
+        self.client.get(RECIPE_URL)
+
+        url = reverse('recipe:tag-detail', args=[tag.id])
+        self.client.patch(url, {'name': 'New'})
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'New')
+
+    def test_orm_writes_invalidate(self):
+        """Test writes outside the API, as from the admin, invalidate."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Old')
+        self.client.get(RECIPE_URL)
+
+        recipe.tags.add(tag)
+        self.assertEqual(len(self.client.get(RECIPE_URL).data[0]['tags']), 1)
+
+        recipe.title = 'Renamed'
+        recipe.save()
+        self.assertEqual(self.client.get(RECIPE_URL).data[0]['title'],
+                         'Renamed')
+
+        tag.delete()
+        self.assertEqual(self.client.get(RECIPE_URL).data[0]['tags'], [])
+
+        Recipe.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get(RECIPE_URL).data, [])
+
+    def test_bulk_delete_bumps_once(self):
+        """Test one delete() of many recipes bumps the version once."""
+        for i in range(3):
+            create_recipe(self.user, title=f'Recipe {i}')
+
+        with patch('recipe.signals.bump_data_version') as patched_bump:
+            Recipe.objects.filter(user=self.user).delete()
+
+        patched_bump.assert_called_once()
+
+    def test_cache_isolated_per_user(self):
+        """Test cached lists are never shared between users."""
+        create_recipe(self.user)
+        self.client.get(RECIPE_URL)
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_hit_miss_counters(self):
+        """Test cache hits and misses are counted."""
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+
+        stats = recipe_list_cache.stats()
+
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
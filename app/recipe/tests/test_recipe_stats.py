@@ -0,0 +1,111 @@
+"""
+Test cases for the recipe statistics endpoint.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+class RecipeStatsTests(TestCase):
+    """Test the per-user recipe statistics."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'stats@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, price, time_minutes, tags=()):
+        """Create a recipe for the test user with the given tags."""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Recipe', price=Decimal(price),
+            time_minutes=time_minutes)
+        recipe.tags.add(*tags)
+        return recipe
+
+    def test_stats(self):
+        """Test totals, percentiles, histograms and tag averages."""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        self.create_recipe('1.00', 10, [vegan, quick])
+        self.create_recipe('2.00', 20, [vegan])
+        self.create_recipe('3.00', 30, [vegan])
+        self.create_recipe('10.00', 40)
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        Recipe.objects.create(user=other, title='Other', time_minutes=500,
+                              price=Decimal('99.00'))
+
+        response = self.client.get(STATS_URL, {'buckets': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recipes'], 4)
+        price = response.data['price']
+        self.assertEqual((price['min'], price['max']), (1.0, 10.0))
+        self.assertEqual(price['total'], 16.0)
+        self.assertEqual(price['mean'], 4.0)
+        self.assertEqual(price['percentiles']['p50'], 2.5)
+        self.assertEqual([b['count'] for b in price['histogram']],
+                         [3, 0, 1])
+        self.assertEqual(price['histogram'][1],
+                         {'min': 4.0, 'max': 7.0, 'count': 0})
+        minutes = response.data['time_minutes']
+        self.assertEqual(minutes['percentiles']['p25'], 17.5)
+        # The maximum falls in the last bucket rather than past it.
+        self.assertEqual([b['count'] for b in minutes['histogram']],
+                         [1, 1, 2])
+        self.assertEqual(response.data['tags'], [
+            {'id': vegan.id, 'name': 'Vegan', 'recipes': 3,
+             'average_price': 2.0},
+            {'id': quick.id, 'name': 'Quick', 'recipes': 1,
+             'average_price': 1.0},
+        ])
+
+    def test_stats_empty_library(self):
+        """Test statistics for a user without recipes."""
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recipes'], 0)
+        self.assertIsNone(response.data['price']['mean'])
+        self.assertEqual(response.data['price']['histogram'], [])
+        self.assertEqual(response.data['tags'], [])
+
+    def test_stats_single_value(self):
+        """Test a histogram when every recipe has the same value."""
+        self.create_recipe('2.00', 15)
+        self.create_recipe('2.00', 15)
+
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.data['price']['histogram'],
+                         [{'min': 2.0, 'max': 2.0, 'count': 2}])
+
+    def test_stats_cached_until_write(self):
+        """Test statistics are cached until the user's data changes."""
+        self.create_recipe('2.00', 15)
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(STATS_URL)
+        self.assertEqual(response.data['recipes'], 1)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.client.delete(reverse('recipe:recipe-detail', args=[recipe.id]))
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.data['recipes'], 0)
+
+    def test_stats_invalid_buckets(self):
+        """Test a non-numeric bucket count is rejected."""
+        response = self.client.get(STATS_URL, {'buckets': 'many'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,91 @@
+"""
+Test cases for the shopping list endpoint.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+SHOPPING_LIST_URL = reverse('recipe:recipe-shopping-list')
+
+
+class ShoppingListTests(TestCase):
+    """Test merging the ingredients of several recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'shopping@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        self.leek, self.potato, self.salt = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Leek', 'Potato', 'Salt')]
+
+    def create_recipe(self, ingredients, user=None):
+        """Create a recipe linked to the given ingredients."""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title='Recipe', time_minutes=10,
+            price=Decimal('2.00'))
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def test_shopping_list(self):
+        """Test each ingredient is listed once with its recipes."""
+        soup = self.create_recipe([self.leek, self.potato])
+        chips = self.create_recipe([self.potato, self.salt])
+        self.create_recipe([self.salt])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                SHOPPING_LIST_URL, {'ids': f'{chips.id},{soup.id}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'id': self.leek.id, 'name': 'Leek', 'recipes': [soup.id]},
+            {'id': self.potato.id, 'name': 'Potato',
+             'recipes': [soup.id, chips.id]},
+            {'id': self.salt.id, 'name': 'Salt', 'recipes': [chips.id]},
+        ])
+
+    def test_shopping_list_other_users_recipes(self):
+        """Test recipes of other users are left out."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        flour = Ingredient.objects.create(user=other, name='Flour')
+        bread = self.create_recipe([flour], user=other)
+
+        response = self.client.get(SHOPPING_LIST_URL, {'ids': bread.id})
+
+        self.assertEqual(response.data, [])
+
+    def test_shopping_list_cached_per_recipe_set(self):
+        """Test the list is cached for the set of ids until a write."""
+        soup = self.create_recipe([self.leek])
+        chips = self.create_recipe([self.potato])
+        self.client.get(SHOPPING_LIST_URL, {'ids': f'{soup.id},{chips.id}'})
+
+        with self.assertNumQueries(0):
+            self.client.get(
+                SHOPPING_LIST_URL, {'ids': f'{chips.id},{soup.id},{soup.id}'})
+
+        self.client.patch(
+            reverse('recipe:recipe-detail', args=[soup.id]),
+            {'ingredients': [{'name': 'Salt'}]}, format='json')
+        response = self.client.get(
+            SHOPPING_LIST_URL, {'ids': f'{soup.id},{chips.id}'})
+
+        self.assertEqual([item['name'] for item in response.data],
+                         ['Potato', 'Salt'])
+
+    def test_shopping_list_invalid_ids(self):
+        """Test missing, malformed and too many ids are rejected."""
+        for ids in ('', 'soup', ','.join(str(i) for i in range(101))):
+            response = self.client.get(SHOPPING_LIST_URL, {'ids': ids})
+
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST)
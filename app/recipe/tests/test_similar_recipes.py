@@ -0,0 +1,210 @@
+"""
+Test cases for the similar recipes endpoint and index.
+"""
+import random
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.similarity import SimilarityIndex, SimilarityIndexes
+
+
+def similar_url(recipe_id):
+    """Create and return a similar recipes URL."""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+class SimilarityIndexTests(SimpleTestCase):
+    """Test the in-memory similarity index."""
+
+    def test_matches_full_scan(self):
+        """Test the index ranks recipes like scoring every pair does."""
+        rng = random.Random(0)
+        index = SimilarityIndex()
+        library = {}
+        for recipe_id in range(1, 400):
+            features = set(rng.sample(range(40), rng.randint(1, 8)))
+            library[recipe_id] = features
+            index.add(recipe_id, features)
+        for recipe_id in range(1, 400, 7):
+            index.remove(recipe_id)
+            del library[recipe_id]
+
+        for recipe_id in list(library)[:50]:
+            mine = library[recipe_id]
+            expected = sorted((
+                (len(mine & other) / len(mine | other), other_id)
+                for other_id, other in library.items()
+                if other_id != recipe_id and mine & other
+            ), reverse=True)[:5]
+
+            result = index.similar(recipe_id, 5)
+
+            self.assertEqual(result, [(other_id, score)
+                                      for score, other_id in expected])
+
+    def test_unknown_recipe(self):
+        """Test a recipe without features has no similar recipes."""
+        index = SimilarityIndex()
+        index.add(1, {1, 2})
+
+        self.assertEqual(index.similar(2, 5), [])
+
+
+def sized_index(user, sequence=0):
+    """Return an index whose postings grow with the user's id."""
+    index = SimilarityIndex(sequence)
+    for recipe_id in range(user.pk * 100):
+        index.add(recipe_id, {1})
+
+    return index
+
+
+@patch.object(SimilarityIndex, 'build', side_effect=sized_index)
+class SimilarityIndexesTests(SimpleTestCase):
+    """Test the per-process LRU of similarity indexes."""
+
+    def test_evicts_to_byte_budget(self, patched_build):
+        """Test indexes are evicted once their postings exceed the budget."""
+        small, medium, large = (SimpleNamespace(pk=pk) for pk in (1, 2, 3))
+        budget = sized_index(medium).nbytes() + sized_index(large).nbytes()
+        indexes = SimilarityIndexes(max_users=10, max_bytes=budget)
+
+        indexes.similar(small, 0, 5)
+        indexes.similar(large, 0, 5)
+        self.assertEqual(indexes.stats()['users'], 2)
+        indexes.similar(medium, 0, 5)
+
+        stats = indexes.stats()
+        self.assertEqual(stats['users'], 2)
+        self.assertLessEqual(stats['bytes'], budget)
+        indexes.similar(large, 0, 5)
+        self.assertEqual(indexes.stats()['builds'], 3)
+
+    def test_build_does_not_block_other_users(self, patched_build):
+        """Test one user's build leaves other users' queries running."""
+        building, release = threading.Event(), threading.Event()
+
+        def slow_build(user, sequence=0):
+            if user.pk == 1:
+                building.set()
+                release.wait(5)
+            return sized_index(user, sequence)
+
+        patched_build.side_effect = slow_build
+        indexes = SimilarityIndexes(max_users=10, max_bytes=10 ** 9)
+        slow = threading.Thread(
+            target=indexes.similar, args=(SimpleNamespace(pk=1), 0, 5))
+        slow.start()
+        try:
+            self.assertTrue(building.wait(5))
+            other = threading.Thread(
+                target=indexes.similar, args=(SimpleNamespace(pk=2), 0, 5))
+            other.start()
+            other.join(5)
+
+            self.assertFalse(other.is_alive())
+            self.assertTrue(slow.is_alive())
+        finally:
+            release.set()
+            slow.join()
+
+
+class SimilarRecipesApiTests(TestCase):
+    """Test the similar recipes endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'similar@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Leek', 'Potato', 'Salt', 'Sugar')]
+
+    def create_recipe(self, title, ingredients, tags=()):
+        """Create a recipe for the test user linked to the given items."""
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=10,
+            price=Decimal('2.00'))
+        recipe.ingredients.add(*ingredients)
+        recipe.tags.add(*tags)
+        return recipe
+
+    def test_similar_recipes(self):
+        """Test recipes are ranked by shared ingredients and tags."""
+        leek, potato, salt, sugar = self.ingredients
+        soup = self.create_recipe('Soup', [leek, potato, salt], [self.tag])
+        stew = self.create_recipe('Stew', [leek, potato, salt])
+        chips = self.create_recipe('Chips', [potato, salt])
+        self.create_recipe('Cake', [sugar])
+
+        response = self.client.get(similar_url(soup.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['id'], r['similarity']) for r in response.data],
+            [(stew.id, 0.75), (chips.id, 0.5)])
+        self.assertEqual(response.data[0]['title'], 'Stew')
+
+    def test_similar_recipes_follow_writes(self):
+        """Test the index picks up recipes changed through the API."""
+        leek, potato, salt, sugar = self.ingredients
+        soup = self.create_recipe('Soup', [leek, potato])
+        cake = self.create_recipe('Cake', [sugar])
+        self.client.get(similar_url(soup.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('recipe:recipe-detail', args=[cake.id]),
+                {'ingredients': [{'name': 'Leek'}]}, format='json')
+        response = self.client.get(similar_url(soup.id))
+
+        self.assertEqual([r['id'] for r in response.data], [cake.id])
+
+    def test_similar_recipes_follow_orm_writes(self):
+        """Test the index picks up tags deleted outside the API."""
+        leek, potato = self.ingredients[:2]
+        soup = self.create_recipe('Soup', [leek], [self.tag])
+        self.create_recipe('Mash', [potato], [self.tag])
+        self.assertEqual(len(self.client.get(similar_url(soup.id)).data), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        response = self.client.get(similar_url(soup.id))
+
+        self.assertEqual(response.data, [])
+
+    def test_similar_recipes_limit_and_fields(self):
+        """Test the limit and sparse fields apply to similar recipes."""
+        leek = self.ingredients[0]
+        soup = self.create_recipe('Soup', [leek])
+        for i in range(3):
+            self.create_recipe(f'Recipe {i}', [leek])
+
+        response = self.client.get(
+            similar_url(soup.id), {'limit': 2, 'fields': 'title'})
+
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(set(response.data[0]), {'title', 'similarity'})
+
+    def test_similar_other_users_recipe(self):
+        """Test similar recipes of another user's recipe are not found."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        recipe = Recipe.objects.create(
+            user=other, title='Other', time_minutes=10,
+            price=Decimal('2.00'))
+
+        response = self.client.get(similar_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,7 +1,10 @@
 """
 Test for tag API
 """
+from base64 import b64decode
 from decimal import Decimal
+from urllib.parse import parse_qs, urlsplit
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
@@ -13,6 +16,7 @@ from recipe.serializers import TagSerializer
 
 
 TAG_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 def detail_url(tag_id):
@@ -136,3 +140,174 @@ class PrivateTagApiTests(TestCase):
         response = self.client.get(TAG_URL, {'assigned_only': 1})
 
         self.assertEqual(len(response.data), 1)
+
+    def test_invalid_flag(self):
+        """Test a 0/1 parameter with another value returns 400."""
+        for params in ({'with_counts': 'yes'}, {'assigned_only': '2'}):
+            response = self.client.get(TAG_URL, params)
+
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
+
+    def test_tags_cursor_pagination(self):
+        """Test paginating tags by name with an opaque cursor."""
+        for name in ('Apple', 'Banana', 'Cherry'):
+            Tag.objects.create(user=self.user, name=name)
+
+        response = self.client.get(TAG_URL, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [t['name'] for t in response.data['results']]
+        self.assertEqual(names, ['Cherry', 'Banana'])
+
+        response = self.client.get(response.data['next'])
+
+        names = [t['name'] for t in response.data['results']]
+        self.assertEqual(names, ['Apple'])
+        self.assertIsNone(response.data['next'])
+
+    def test_popularity_cursor_pagination_with_ties(self):
+        """Test cursors page through tied counts without offsets."""
+        names = [f'Tag {i}' for i in range(5)]
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
+        params = {'ordering': 'popularity', 'page_size': 2}
+
+        seen = []
+        response = self.client.get(TAG_URL, params)
+        while True:
+            seen += [t['name'] for t in response.data['results']]
+            if not response.data['next']:
+                break
+            cursor = parse_qs(urlsplit(response.data['next']).query)
+            self.assertNotIn('o=', b64decode(cursor['cursor'][0]).decode())
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen, sorted(names, reverse=True))
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([t['name'] for t in response.data['results']],
+                         ['Tag 2', 'Tag 1'])
+
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming a tag to a name the user already has fails."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        tag = Tag.objects.create(user=self.user, name='Supper')
+
+        response = self.client.patch(detail_url(tag.id), {'name': 'Dinner'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Supper')
+
+    def test_autocomplete_prefix(self):
+        """Test autocomplete returns prefix matches, shortest first."""
+        Tag.objects.create(user=self.user, name='Breakfast Bowls')
+        Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Bread')
+        Tag.objects.create(user=self.user, name='Dinner')
+        other = create_user(email='other@example.com')
+        Tag.objects.create(user=other, name='Brunch')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'BRE'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [t['name'] for t in response.data]
+        self.assertEqual(names, ['Bread', 'Breakfast', 'Breakfast Bowls'])
+
+    def test_autocomplete_word_prefix(self):
+        """Test autocomplete falls back to names with matching words."""
+        Tag.objects.create(user=self.user, name='Butternut')
+        Tag.objects.create(user=self.user, name='Peanut Butter')
+        Tag.objects.create(user=self.user, name='Rebuttal')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'butter'})
+
+        names = [t['name'] for t in response.data]
+        self.assertEqual(names, ['Butternut', 'Peanut Butter'])
+
+    def test_autocomplete_limit(self):
+        """Test autocomplete returns at most limit results."""
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'Soup {i}')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'so', 'limit': 2})
+
+        self.assertEqual(len(response.data), 2)
+
+    def test_autocomplete_empty_prefix(self):
+        """Test autocomplete without a prefix returns nothing."""
+        Tag.objects.create(user=self.user, name='Soup')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': ' '})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_autocomplete_cached_until_write(self):
+        """Test repeated completions skip the database until a write."""
+        tag = Tag.objects.create(user=self.user, name='Soup')
+        self.client.get(AUTOCOMPLETE_URL, {'q': 'so'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(AUTOCOMPLETE_URL, {'q': 'so'})
+        self.assertEqual(len(response.data), 1)
+
+        self.client.patch(detail_url(tag.id), {'name': 'Stew'})
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'so'})
+
+        self.assertEqual(response.data, [])
+
+    def test_tags_with_counts(self):
+        """Test listing tags with the number of recipes using each."""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Unused')
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                title=f'Recipe {i}', time_minutes=5,
+                price=Decimal('1.00'), user=self.user)
+            recipe.tags.add(vegan)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(TAG_URL, {'with_counts': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {t['name']: t['recipe_count'] for t in response.data}
+        self.assertEqual(counts, {'Vegan': 3, 'Unused': 0})
+
+    def test_assigned_tags_with_counts(self):
+        """Test counts combine with the assigned only filter."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Unused')
+        recipe = Recipe.objects.create(
+            title='Soup', time_minutes=5, price=Decimal('1.00'),
+            user=self.user)
+        recipe.tags.add(tag)
+
+        response = self.client.get(
+            TAG_URL, {'assigned_only': 1, 'with_counts': 1})
+
+        self.assertEqual(response.data,
+                         [{'id': tag.id, 'name': 'Vegan', 'recipe_count': 1}])
+
+    def test_tags_ordered_by_popularity(self):
+        """Test ordering tags by the number of recipes using them."""
+        names = ['Rare', 'Common', 'Unused', 'Usual']
+        tags = {name: Tag.objects.create(user=self.user, name=name)
+                for name in names}
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                title=f'Recipe {i}', time_minutes=5,
+                price=Decimal('1.00'), user=self.user)
+            recipe.tags.add(tags['Common'])
+            if i:
+                recipe.tags.add(tags['Usual'])
+        recipe.tags.add(tags['Rare'])
+
+        response = self.client.get(
+            TAG_URL, {'ordering': 'popularity', 'with_counts': 1})
+
+        self.assertEqual([(t['name'], t['recipe_count'])
+                          for t in response.data],
+                         [('Common', 3), ('Usual', 2), ('Rare', 1),
+                          ('Unused', 0)])
@@ -3,7 +3,7 @@ URL patterns for the recipe app.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from recipe import views
+from recipe import async_views, views
 # Create a router and register the RecipeViewSet with it
 
 router = DefaultRouter()
@@ -16,3 +16,20 @@ app_name = 'recipe'
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# Async read-only views, for deployments served over ASGI.
+urlpatterns += [
+    path('async/recipes/', async_views.RecipeReadView.as_view(),
+         name='async-recipe-list'),
+    path('async/recipes/<int:pk>/', async_views.RecipeReadView.as_view(),
+         name='async-recipe-detail'),
+    path('async/tags/', async_views.TagReadView.as_view(),
+         name='async-tag-list'),
+    path('async/tags/<int:pk>/', async_views.TagReadView.as_view(),
+         name='async-tag-detail'),
+    path('async/ingredients/', async_views.IngredientReadView.as_view(),
+         name='async-ingredient-list'),
+    path('async/ingredients/<int:pk>/',
+         async_views.IngredientReadView.as_view(),
+         name='async-ingredient-detail'),
+]
@@ -1,21 +1,75 @@
 """
 Views for the recipe API endpoints.
 """
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast, Length, Lower
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import viewsets, mixins, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from recipe import serializers
+from user.authentication import SignedTokenAuthentication
+from recipe import export, serializers
+from recipe.bulk import (change_tags, create_recipes, delete_recipes,
+                         update_recipes)
+from recipe.cache import (autocomplete_cache, get_data_version,
+                          recipe_list_cache, recipe_stats_cache,
+                          shopping_list_cache)
+from recipe.filters import filter_recipes
+from recipe.mixins import (CachedListMixin, ConditionalRequestMixin,
+                           SparseFieldsMixin)
+from recipe.pagination import OptInCursorPagination
+from recipe.parsers import NDJSONParser
+from recipe.shopping import (MAX_RECIPES as SHOPPING_MAX_RECIPES,
+                             shopping_list)
+from recipe.similarity import (DEFAULT_LIMIT as SIMILAR_LIMIT,
+                               MAX_LIMIT as SIMILAR_MAX_LIMIT,
+                               similarity_indexes)
+from recipe.stats import DEFAULT_BUCKETS, MAX_BUCKETS, recipe_stats
 from core.models import Recipe, Tag, Ingredient
 from drf_spectacular.utils import (extend_schema_view,
                                    extend_schema, OpenApiParameter)
 from drf_spectacular.types import OpenApiTypes
 
 
+GZIP_RE = re.compile(r'\bgzip\b')
+
+EXPORT_FORMATS = {
+    'ndjson': (export.iter_ndjson, 'application/x-ndjson'),
+    'csv': (export.iter_csv, 'text/csv; charset=utf-8'),
+}
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return.',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description='Comma separated list of nested relations (tags, '
+                    'ingredients) to return alongside fields.',
+    ),
+]
+
+
 @extend_schema_view(
     list=extend_schema(
-        parameters=[
+        parameters=SPARSE_FIELDS_PARAMETERS + [
             OpenApiParameter(
                 'tags',
                 OpenApiTypes.STR,
@@ -25,40 +79,86 @@ from drf_spectacular.types import OpenApiTypes
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient IDs to filter',
-            )
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search over title and description; '
+                            'results are ranked by relevance.',
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Match recipes having any (default) or all of '
+                            'the requested tags and ingredients.',
+            ),
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalRequestMixin,
+                    CachedListMixin,
+                    SparseFieldsMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    # The search vector is only needed inside the database.
+    queryset = Recipe.objects.defer('search_vector')
+    authentication_classes = [SignedTokenAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    list_cache = recipe_list_cache
+    expandable_fields = ('tags', 'ingredients')
+    ordering = '-id'
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _search_query(self):
+        """Return the full-text query for ?search=, if any."""
+        search = self.request.query_params.get('search', '').strip()
+        if not search:
+            return None
+
+        return SearchQuery(search, search_type='websearch', config='english')
+
+    def get_ordering(self):
+        """Return the ordering, ranking search results first."""
+        if self._search_query() is not None:
+            return ('-rank', '-id')
+
+        return (self.ordering,)
+
     def get_queryset(self):
         """Return recipes for the authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(
-                ingredients__id__in=ingredient_ids)
-
-        return queryset.filter(user=self.request.user
-                               ).order_by('-id').distinct()
+        match_all = self.request.query_params.get('match') == 'all'
+        queryset = filter_recipes(
+            self.queryset.filter(user=self.request.user),
+            tag_ids=self._params_to_ints(tags) if tags else None,
+            ingredient_ids=(
+                self._params_to_ints(ingredients) if ingredients else None),
+            match_all=match_all,
+        )
+        search_query = self._search_query()
+        if search_query is not None:
+            # Ranks are cast to double precision so that cursor positions
+            # round-trip exactly through the pagination cursor.
+            queryset = queryset.filter(search_vector=search_query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), search_query),
+                          FloatField()))
+
+        # Nested tags and ingredients are loaded in one batched query each,
+        # rather than two extra queries per serialized recipe, and only
+        # when the response includes them.
+        return self.project_queryset(
+            queryset.order_by(*self.get_ordering()))
 
     def get_serializer_class(self):
         """Return appropriate serializer class based on action."""
-        if self.action == 'list':
+        if self.action in ('list', 'bulk', 'similar', 'cookable'):
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
@@ -77,6 +177,282 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Delete a recipe."""
         instance.delete()
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'output',
+                OpenApiTypes.STR, enum=list(EXPORT_FORMATS),
+                description='Export format (default ndjson).',
+            ),
+        ],
+        responses={(200, content_type): OpenApiTypes.STR
+                   for _, content_type in EXPORT_FORMATS.values()},
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def export(self, request):
+        """Stream all of the user's recipes as NDJSON or CSV."""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {'output': [f'Choose one of: {", ".join(EXPORT_FORMATS)}.']})
+
+        generate, content_type = EXPORT_FORMATS[output]
+        content = generate(
+            self.queryset.filter(user=request.user).order_by('id'),
+            settings.RECIPE_EXPORT_CHUNK_SIZE)
+        gzip = GZIP_RE.search(request.headers.get('Accept-Encoding', ''))
+        if gzip:
+            content = compress_sequence(content)
+        if isinstance(request._request, ASGIRequest):
+            content = export.AsyncStream(content)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{output}"')
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        return response
+
+    @extend_schema(
+        request=serializers.RecipeSerializer(many=True),
+        responses={(201, 'application/json'): OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=['post'],
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Create many recipes from a JSON array or NDJSON body.
+
+        Every item is validated and valid ones are created together; the
+        response lists a result for each item in request order.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of recipes.']})
+        if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'At most {settings.RECIPE_BULK_MAX_ITEMS} items may be '
+                'sent at once.']})
+
+        serializer = self.get_serializer()
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, serializer.run_validation(item)))
+            except ValidationError as exc:
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST,
+                                  'errors': exc.detail}
+
+        recipes = create_recipes(
+            request.user, [data for _, data in valid]) if valid else []
+        for (index, _), recipe in zip(valid, recipes):
+            results[index] = {'status': status.HTTP_201_CREATED,
+                              'id': recipe.id}
+
+        return Response(
+            {'results': results},
+            status=(status.HTTP_201_CREATED if recipes
+                    else status.HTTP_400_BAD_REQUEST))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'buckets',
+                OpenApiTypes.INT,
+                description='Number of histogram buckets '
+                            f'(default {DEFAULT_BUCKETS}, '
+                            f'at most {MAX_BUCKETS}).',
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def stats(self, request):
+        """Return price and time statistics for the user's recipes."""
+        key = recipe_stats_cache.key(request)
+        data = recipe_stats_cache.get(key)
+        if data is None:
+            try:
+                buckets = int(request.query_params.get(
+                    'buckets', DEFAULT_BUCKETS))
+            except ValueError:
+                raise ValidationError(
+                    {'buckets': ['A valid integer is required.']})
+            buckets = max(1, min(buckets, MAX_BUCKETS))
+            data = recipe_stats(request.user, buckets)
+            recipe_stats_cache.set(key, data)
+
+        return Response(data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'ids',
+                OpenApiTypes.STR,
+                required=True,
+                description='Comma separated list of recipe IDs '
+                            f'(at most {SHOPPING_MAX_RECIPES}).',
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=['get'], pagination_class=None,
+            url_path='shopping-list')
+    def shopping_list(self, request):
+        """Return the merged ingredients of a set of recipes.
+
+        Each ingredient is listed once with the ids of the recipes that
+        need it.
+        """
+        try:
+            ids = sorted(set(self._params_to_ints(
+                request.query_params.get('ids', ''))))
+        except ValueError:
+            raise ValidationError(
+                {'ids': ['A comma separated list of integers is required.']})
+        if len(ids) > SHOPPING_MAX_RECIPES:
+            raise ValidationError({'ids': [
+                f'At most {SHOPPING_MAX_RECIPES} recipes may be given.']})
+
+        key = shopping_list_cache.key(request, ids)
+        data = shopping_list_cache.get(key)
+        if data is None:
+            data = shopping_list(request.user, ids)
+            shopping_list_cache.set(key, data)
+
+        return Response(data)
+
+    @extend_schema(
+        parameters=SPARSE_FIELDS_PARAMETERS + [
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Maximum number of recipes '
+                            f'(default {SIMILAR_LIMIT}, '
+                            f'at most {SIMILAR_MAX_LIMIT}).',
+            ),
+        ],
+    )
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def similar(self, request, pk=None):
+        """Return the recipes sharing the most ingredients and tags.
+
+        Each recipe carries its Jaccard ``similarity`` to this one.
+        """
+        recipe = get_object_or_404(
+            self.queryset.filter(user=request.user).only('id'), pk=pk)
+        try:
+            limit = int(request.query_params.get('limit', SIMILAR_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        limit = max(1, min(limit, SIMILAR_MAX_LIMIT))
+
+        ranked = similarity_indexes.similar(request.user, recipe.id, limit)
+        recipes = self.project_queryset(
+            self.queryset.filter(user=request.user)).in_bulk(
+                [recipe_id for recipe_id, _ in ranked])
+        ranked = [(recipes[recipe_id], score) for recipe_id, score in ranked
+                  if recipe_id in recipes]
+        data = self.get_serializer(
+            [recipe for recipe, _ in ranked], many=True).data
+        for item, (_, score) in zip(data, ranked):
+            item['similarity'] = round(score, 4)
+
+        return Response(data)
+
+    @extend_schema(
+        request=serializers.PantrySerializer,
+        responses=serializers.RecipeSerializer(many=True),
+    )
+    @action(detail=False, methods=['post'], pagination_class=None)
+    def cookable(self, request):
+        """Return the recipes that can be made from a set of ingredients.
+
+        Each recipe carries the ids of the ingredients it still needs in
+        ``missing`` and the share of its ingredients on hand in
+        ``coverage``.
+        """
+        serializer = serializers.PantrySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        ranked = similarity_indexes.cookable(
+            request.user, params['ingredients'], params['max_missing'],
+            params['limit'])
+        recipes = self.project_queryset(
+            self.queryset.filter(user=request.user)).in_bulk(
+                [recipe_id for recipe_id, _, _ in ranked])
+        ranked = [(recipes[recipe_id], count, missing)
+                  for recipe_id, count, missing in ranked
+                  if recipe_id in recipes]
+        data = self.get_serializer(
+            [recipe for recipe, _, _ in ranked], many=True).data
+        for item, (_, count, missing) in zip(data, ranked):
+            item['missing'] = missing
+            item['coverage'] = round((count - len(missing)) / count, 4)
+
+        return Response(data)
+
+    def _batch_results(self, ids, found, success):
+        """Return a result for each requested id in request order."""
+        return {'results': [
+            {'id': id, 'status': success} if id in found else
+            {'id': id, 'status': status.HTTP_404_NOT_FOUND,
+             'errors': {'detail': 'Not found.'}}
+            for id in ids
+        ]}
+
+    @extend_schema(
+        request=serializers.RecipeBatchUpdateSerializer,
+        responses=OpenApiTypes.OBJECT,
+    )
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Apply the same field changes to a batch of recipes."""
+        serializer = serializers.RecipeBatchUpdateSerializer(
+            data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = update_recipes(
+            request.user, ids, serializer.validated_data['data'])
+
+        return Response(self._batch_results(ids, found, status.HTTP_200_OK))
+
+    @extend_schema(
+        request=serializers.RecipeBatchSerializer,
+        responses=OpenApiTypes.OBJECT,
+    )
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete a batch of recipes."""
+        serializer = serializers.RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = delete_recipes(request.user, ids)
+
+        return Response(
+            self._batch_results(ids, found, status.HTTP_204_NO_CONTENT))
+
+    @extend_schema(
+        request=serializers.RecipeBatchTagsSerializer,
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=['post'], url_path='bulk/tags')
+    def bulk_tags(self, request):
+        """Add and remove tags on a batch of recipes."""
+        serializer = serializers.RecipeBatchTagsSerializer(
+            data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = change_tags(
+            request.user, ids,
+            add=serializer.validated_data['add'],
+            remove=serializer.validated_data['remove'])
+
+        return Response(self._batch_results(ids, found, status.HTTP_200_OK))
+
     @action(detail=True, methods=['post'])
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
@@ -99,38 +475,140 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes.',
             ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include the number of recipes using each item.',
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR, enum=['name', 'popularity'],
+                description='Order by name (default) or by the number of '
+                            'recipes using each item.',
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(ConditionalRequestMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Base viewset for recipe attribute."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    ordering = '-name'
+
+    def _flag(self, name):
+        """Return whether a 0/1 query parameter is set."""
+        value = self.request.query_params.get(name, '0')
+        if value not in ('0', '1'):
+            raise ValidationError({name: ['Must be 0 or 1.']})
+
+        return value == '1'
 
     def get_queryset(self):
         """Return objects for the authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self._flag('assigned_only'):
+            # A semi-join stops at the first link, rather than joining
+            # every link and de-duplicating the result.
+            field = Recipe._meta.get_field(self.recipe_relation)
+            links = field.remote_field.through.objects.filter(
+                **{field.m2m_reverse_name(): OuterRef('pk')})
+            queryset = queryset.filter(Exists(links))
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+        return queryset.order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        """Return the ordering, most used first if requested."""
+        if self.request.query_params.get('ordering') == 'popularity':
+            return ('-recipe_count', '-name')
+
+        return (self.ordering,)
+
+    def get_serializer_class(self):
+        """Return the serializer, with usage counts if requested."""
+        if self.action == 'list' and self._flag('with_counts'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def _autocomplete(self, prefix, limit):
+        """Return up to limit items matching a lower-cased prefix.
+
+        Names starting with the prefix come first, shortest first. If that
+        leaves room, names with words starting with each word of the prefix
+        (``peanut butter`` for ``but`` or ``butter pea``) fill the rest.
+        """
+        queryset = self.queryset.filter(user=self.request.user).annotate(
+            name_lower=Lower('name')).order_by(Length('name'), 'name_lower')
+        matches = list(queryset.filter(name_lower__startswith=prefix)[:limit])
+        words = re.findall(r'\w+', prefix)
+        if len(matches) < limit and words:
+            word_query = SearchQuery(
+                ' & '.join(f'{word}:*' for word in words),
+                search_type='raw', config='simple')
+            matches += queryset.annotate(
+                words=SearchVector('name', config='simple')
+            ).filter(words=word_query).exclude(
+                name_lower__startswith=prefix)[:limit - len(matches)]
+
+        return matches
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', OpenApiTypes.STR,
+                             description='Name prefix to complete.'),
+            OpenApiParameter('limit', OpenApiTypes.INT,
+                             description='Maximum number of results.'),
+        ]
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def autocomplete(self, request):
+        """Return the top names matching a prefix."""
+        prefix = request.query_params.get('q', '').strip().lower()
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        limit = max(1, min(limit, settings.AUTOCOMPLETE_MAX_LIMIT))
+        if not prefix:
+            return Response([])
+
+        key = (self.queryset.model._meta.label, request.user.pk,
+               get_data_version(request.user), prefix, limit)
+        data = autocomplete_cache.get(key)
+        if data is None:
+            data = list(self.get_serializer(
+                self._autocomplete(prefix, limit), many=True).data)
+            autocomplete_cache.set(key, data)
+
+        return Response(data)
+
+    def perform_update(self, serializer):
+        """Update an item, refusing a name the user already has."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError(
+                {'name': ['You already have an item with this name.']})
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
+    recipe_relation = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
     queryset = Ingredient.objects.all()
+    recipe_relation = 'ingredients'
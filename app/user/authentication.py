@@ -0,0 +1,185 @@
+"""
+Signed access and refresh tokens for the API.
+
+Access tokens carry the user's id, email and staff flag, signed with the
+project's secret key, so authenticating a request is an HMAC check with
+no database query. They are short-lived; clients trade a longer-lived
+refresh token for a new pair, which is the only point where the user is
+read back from the database.
+
+Revoking a user's tokens records a cut-off time in the shared cache.
+Each process remembers the cut-offs it has looked up for a few seconds,
+so revocation takes effect within that interval without a cache round
+trip on every request.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import router
+from django.utils.crypto import constant_time_compare, salted_hmac
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from drf_spectacular.plumbing import build_bearer_security_scheme_object
+from rest_framework import exceptions
+from rest_framework.authentication import (BaseAuthentication,
+                                           get_authorization_header)
+
+from recipe.cache import LocalLRUCache
+
+ACCESS_SALT = 'user.authentication.access'
+REFRESH_SALT = 'user.authentication.refresh'
+
+revocations = LocalLRUCache(settings.TOKEN_REVOCATION_CACHE_ENTRIES)
+
+
+def _now_ms():
+    """Return the current time in milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+def _revoked_key(user_id):
+    """Return the cache key of a user's token revocation cut-off."""
+    return f'user:revoked:{user_id}'
+
+
+def _password_fingerprint(user):
+    """Return a digest that changes whenever the user's password does."""
+    return salted_hmac(REFRESH_SALT, user.password).hexdigest()[:16]
+
+
+def issue_tokens(user):
+    """Return a new signed access and refresh token for a user."""
+    issued = _now_ms()
+    access = signing.Signer(salt=ACCESS_SALT).sign_object({
+        'id': user.pk,
+        'email': user.email,
+        'staff': user.is_staff,
+        'iat': issued,
+    })
+    refresh = signing.Signer(salt=REFRESH_SALT).sign_object({
+        'id': user.pk,
+        'pwd': _password_fingerprint(user),
+        'iat': issued,
+    })
+
+    return {'access': access, 'refresh': refresh}
+
+
+def revoke_tokens(user):
+    """Reject the user's access and refresh tokens issued up to now."""
+    revoked = _now_ms()
+    cache.set(_revoked_key(user.pk), revoked,
+              timeout=settings.REFRESH_TOKEN_LIFETIME)
+    revocations.set((user.pk, None), revoked)
+
+
+def _revoked_before(user_id):
+    """Return the user's revocation cut-off, or 0 if there is none."""
+    interval = settings.TOKEN_REVOCATION_CHECK_INTERVAL
+    if not interval:
+        return 0
+
+    # Cut-offs from this process apply at once; others are read from
+    # the shared cache at most once per interval.
+    local = revocations.get((user_id, None)) or 0
+    key = (user_id, int(time.time() // interval))
+    shared = revocations.get(key)
+    if shared is None:
+        shared = cache.get(_revoked_key(user_id), 0)
+        revocations.set(key, shared)
+
+    return max(local, shared)
+
+
+def _check_age(claims, lifetime):
+    """Raise AuthenticationFailed for expired or revoked token claims."""
+    if _now_ms() - claims['iat'] > lifetime * 1000:
+        raise exceptions.AuthenticationFailed('Token has expired.')
+    if claims['iat'] <= _revoked_before(claims['id']):
+        raise exceptions.AuthenticationFailed('Token has been revoked.')
+
+
+def _claims(token, salt):
+    """Return the verified claims of a signed token."""
+    try:
+        return signing.Signer(salt=salt).unsign_object(token)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+
+
+def refresh_tokens(token):
+    """Return a new token pair in exchange for a valid refresh token."""
+    claims = _claims(token, REFRESH_SALT)
+    _check_age(claims, settings.REFRESH_TOKEN_LIFETIME)
+    user = get_user_model().objects.filter(
+        pk=claims['id'], is_active=True).first()
+    if user is None or not constant_time_compare(
+            claims['pwd'], _password_fingerprint(user)):
+        raise exceptions.AuthenticationFailed('Invalid token.')
+
+    return issue_tokens(user)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticate ``Authorization: Bearer <access token>`` headers.
+
+    The user is built from the token's claims without a query; fields
+    not in the token, such as the name, load from the database when they
+    are first read. It is not to be saved: views writing the user load
+    its row first, as ManageUserView does. Other schemes are left to the
+    next authentication class, so opaque ``Token`` keys keep working
+    alongside.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Invalid token header. Token string should not contain '
+                'spaces.')
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                'Invalid token header. Token string should not contain '
+                'invalid characters.')
+
+        claims = _claims(token, ACCESS_SALT)
+        _check_age(claims, settings.ACCESS_TOKEN_LIFETIME)
+
+        return (self._user(claims), token)
+
+    def _user(self, claims):
+        """Return a user instance holding the token's claims."""
+        model = get_user_model()
+        loaded = {
+            'id': claims['id'],
+            'email': claims['email'],
+            'is_staff': claims['staff'],
+            'is_active': True,
+        }
+        # from_db expects values in field order and defers the rest.
+        names = [field.attname for field in model._meta.concrete_fields
+                 if field.attname in loaded]
+
+        return model.from_db(router.db_for_read(model), names,
+                             [loaded[name] for name in names])
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """Describe signed access tokens in the OpenAPI schema."""
+    target_class = SignedTokenAuthentication
+    name = 'signedTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return build_bearer_security_scheme_object(
+            header_name='Authorization', token_prefix=self.target.keyword)
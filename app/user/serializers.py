@@ -64,3 +64,8 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for exchanging a refresh token for new tokens"""
+    refresh = serializers.CharField(trim_whitespace=False)
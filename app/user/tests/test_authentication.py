@@ -0,0 +1,162 @@
+"""
+Tests for signed access and refresh tokens
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from user import authentication
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+ME_URL = reverse('user:me')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class SignedTokenTests(TestCase):
+    """Test authenticating with signed tokens"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testpass123',
+            name='Test Name')
+        self.client = APIClient()
+        response = self.client.post(TOKEN_URL, {
+            'email': 'test@example.com', 'password': 'testpass123'})
+        self.tokens = response.data
+
+    def authenticate(self, token):
+        """Send the access token on every following request"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_login_returns_all_tokens(self):
+        """Test the opaque token still comes with the signed pair"""
+        self.assertEqual(
+            set(self.tokens), {'token', 'access', 'refresh'})
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.tokens["token"]}')
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_access_token_needs_no_query(self):
+        """Test a signed token saves the token table lookup"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.tokens["token"]}')
+        self.client.get(RECIPES_URL)
+        with self.assertNumQueries(1):
+            self.client.get(RECIPES_URL)
+
+        self.authenticate(self.tokens['access'])
+        with self.assertNumQueries(0):
+            response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile_with_access_token(self):
+        """Test fields outside the token load from the database"""
+        self.authenticate(self.tokens['access'])
+
+        response = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(response.data, {
+            'email': 'test@example.com', 'name': 'New Name'})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_profile_update_keeps_flags(self):
+        """Test an update does not write the token's claims back"""
+        self.authenticate(self.tokens['access'])
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False)
+
+        response = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, 'Test Name')
+
+    def test_profile_update_keeps_demotion(self):
+        """Test a demoted user's stale staff claim is not saved"""
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=True)
+        tokens = authentication.issue_tokens(
+            get_user_model().objects.get(pk=self.user.pk))
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False)
+        self.authenticate(tokens['access'])
+
+        response = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_staff)
+        self.assertEqual(self.user.name, 'New Name')
+
+    def test_tampered_token_rejected(self):
+        """Test a token with a changed payload is rejected"""
+        payload, signature = self.tokens['access'].rsplit(':', 1)
+        self.authenticate(f'{payload}x:{signature}')
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_not_accepted_as_access(self):
+        """Test a refresh token cannot authenticate requests"""
+        self.authenticate(self.tokens['refresh'])
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=60)
+    def test_expired_token_rejected(self):
+        """Test access tokens stop working after their lifetime"""
+        self.authenticate(self.tokens['access'])
+        later = authentication._now_ms() + 61 * 1000
+
+        with mock.patch.object(authentication, '_now_ms',
+                               return_value=later):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh(self):
+        """Test a refresh token is exchanged for a new pair"""
+        response = self.client.post(
+            REFRESH_URL, {'refresh': self.tokens['refresh']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'access', 'refresh'})
+        self.authenticate(response.data['access'])
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_refresh_invalid_token(self):
+        """Test access tokens and garbage cannot be refreshed"""
+        for token in (self.tokens['access'], 'garbage'):
+            response = self.client.post(REFRESH_URL, {'refresh': token})
+
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens(self):
+        """Test changing the password invalidates issued tokens"""
+        self.authenticate(self.tokens['access'])
+        self.client.patch(ME_URL, {'password': 'newpass123'})
+
+        response = self.client.get(ME_URL)
+        refreshed = self.client.post(
+            REFRESH_URL, {'refresh': self.tokens['refresh']})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(refreshed.status_code, status.HTTP_401_UNAUTHORIZED)
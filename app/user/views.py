@@ -2,11 +2,18 @@
 views for the user api
 """
 
-from rest_framework import generics, permissions, authentication
+from django.contrib.auth import get_user_model
+from rest_framework import exceptions, generics, permissions, authentication
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from user.authentication import (SignedTokenAuthentication, issue_tokens,
+                                 refresh_tokens, revoke_tokens)
+from user.serializers import (UserSerializer, AuthTokenSerializer,
+                              RefreshTokenSerializer)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -24,21 +31,59 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
-    # def post(self, request, *args, **kwargs):
-    #     """Create and return a new auth token"""
-    #     return super().post(request, *args, **kwargs)
+    def post(self, request, *args, **kwargs):
+        """Return the opaque auth token and a signed token pair"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, created = Token.objects.get_or_create(user=user)
+
+        return Response({'token': token.key, **issue_tokens(user)})
+
+
+class RefreshTokenView(APIView):
+    """Exchange a refresh token for a new signed token pair"""
+    serializer_class = RefreshTokenSerializer
+    # Expired access tokens sent along must not block the refresh.
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def get_authenticate_header(self, request):
+        """Answer rejected refresh tokens with 401, not 403"""
+        return SignedTokenAuthentication.keyword
+
+    def post(self, request):
+        """Return new access and refresh tokens"""
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(refresh_tokens(serializer.validated_data['refresh']))
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (SignedTokenAuthentication,
+                              authentication.TokenAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Retrieve and return the authenticated user"""
-        return self.request.user
+        user = self.request.user
+        if not user.get_deferred_fields():
+            return user
+
+        # Signed tokens give a user built from the token's claims, which
+        # may be stale; saving it would write them back over the row.
+        user = get_user_model().objects.filter(
+            pk=user.pk, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                'User inactive or deleted.')
+        return user
 
     def perform_update(self, serializer):
-        """Update the user with the provided data"""
-        serializer.save()
+        """Update the user, revoking signed tokens on a password change"""
+        user = serializer.save()
+        if 'password' in serializer.validated_data:
+            revoke_tokens(user)